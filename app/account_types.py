@@ -42,9 +42,8 @@ CREDIT_ACCOUNT_TYPES = {
 ALL_ACCOUNT_TYPES = [atype.value for atype in AccountType]
 
 
+_VALUE_TO_TYPE = {member.value: member for member in AccountType}
+
+
 def parse_account_type(value: str | None) -> AccountType:
-    normalized = (value or "").lower()
-    for member in AccountType:
-        if member.value == normalized:
-            return member
-    return AccountType.CHEQUING
+    return _VALUE_TO_TYPE.get((value or "").lower(), AccountType.CHEQUING)
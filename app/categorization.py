@@ -1,24 +1,31 @@
 from __future__ import annotations
 
 import math
+import os
 import re
-from dataclasses import dataclass
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass, replace
 from datetime import date, datetime
+from functools import cache
 from pathlib import Path
-from typing import Iterable, Sequence
-
-import joblib
-import numpy as np
-from scipy.sparse import hstack
-from sklearn.dummy import DummyClassifier
-from sklearn.feature_extraction import DictVectorizer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score, f1_score
-from sklearn.model_selection import train_test_split
+from typing import TYPE_CHECKING, BinaryIO, Callable, Iterable, Sequence
+
+# numpy/scipy/sklearn/joblib are imported inside the methods that need them, so workers
+# that never categorize (e.g. only serving /accounts) don't pay their import time and RSS.
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+    from sklearn.feature_extraction import DictVectorizer
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+try:
+    import ahocorasick
+except ImportError:  # optional accelerator for the keyword fallback rules
+    ahocorasick = None
 
 from .category_labels import ACCOUNT_TRANSFER_CATEGORY, canonicalize_category
-from .category_overrides import lookup_override
 from .text_utils import normalize_description
 
 # Lightweight fallback rules used when the model is missing or unconfident.
@@ -37,11 +44,16 @@ CATEGORIZATION_RULES = {
 }
 
 AUTO_APPLY_THRESHOLD = 0.58
+# Minimum share of held-out predictions int8 weights must agree on to replace float32.
+QUANTIZATION_MIN_AGREEMENT = 0.99
 MODEL_DIR = Path(__file__).resolve().parent / "artifacts"
 MODEL_PATH = MODEL_DIR / "categorizer.joblib"
 
+# (description, amount, date, account_type) for a single transaction to categorize.
+PredictionInput = tuple[str, float | None, date | None, str | None]
 
-@dataclass
+
+@dataclass(slots=True)
 class TrainingExample:
     description: str
     amount: float | None
@@ -50,7 +62,7 @@ class TrainingExample:
     category: str
 
 
-@dataclass
+@dataclass(slots=True)
 class PredictionResult:
     category: str | None
     confidence: float | None
@@ -59,7 +71,7 @@ class PredictionResult:
     normalized_description: str
 
 
-@dataclass
+@dataclass(slots=True)
 class TrainReport:
     trained: bool
     samples: int
@@ -75,8 +87,13 @@ class _ModelBundle:
     text_vectorizer: TfidfVectorizer
     meta_vectorizer: DictVectorizer
     classifier: LogisticRegression
-    labels: list[str]
+    labels: tuple[str, ...]
     trained_at: datetime
+    # Dense (features x labels) copy of the linear model, so inference can skip sklearn's
+    # predict_proba. int8 with a per-label `scale` when quantized, float32 otherwise.
+    weights: np.ndarray | None = None
+    bias: np.ndarray | None = None
+    scale: np.ndarray | None = None
 
 
 class SmartCategorizer:
@@ -87,6 +104,11 @@ class SmartCategorizer:
 
     def __init__(self, model_path: Path = MODEL_PATH):
         self.model_path = model_path
+        # Inference weights live beside the joblib bundle as raw float32 arrays so they
+        # can be memory-mapped instead of unpickled.
+        self.weights_path = model_path.with_name(f"{model_path.stem}_weights.npy")
+        self.bias_path = model_path.with_name(f"{model_path.stem}_bias.npy")
+        self.scale_path = model_path.with_name(f"{model_path.stem}_scale.npy")
         self._bundle: _ModelBundle | None = None
         self._ensure_model_dir()
         self._try_load()
@@ -97,7 +119,117 @@ class SmartCategorizer:
 
     def _try_load(self) -> None:
         if self.model_path.exists():
-            self._bundle = joblib.load(self.model_path)
+            import joblib
+
+            bundle = joblib.load(self.model_path)
+            # Unpickled strings aren't interned; re-intern so labels share identity again.
+            bundle.labels = self._intern_labels(bundle.labels)
+            if getattr(bundle, "weights", None) is None:
+                bundle.weights, bundle.bias, bundle.scale = self._load_weights(bundle)
+            self._bundle = bundle
+
+    def _load_weights(
+        self, bundle: _ModelBundle
+    ) -> tuple[np.ndarray | None, np.ndarray | None, np.ndarray | None]:
+        import numpy as np
+
+        num_labels = len(bundle.labels)
+        if self.weights_path.exists() and self.bias_path.exists():
+            weights = np.load(self.weights_path, mmap_mode="r")
+            bias = np.load(self.bias_path)
+            scale = np.load(self.scale_path) if self.scale_path.exists() else None
+            if (
+                weights.ndim == 2
+                and weights.shape[0] == self._feature_count(bundle)
+                and weights.shape[1] == num_labels
+                and bias.shape == (num_labels,)
+                and (scale is None or scale.shape == (num_labels,))
+                and (scale is not None) == (weights.dtype == np.int8)
+            ):
+                return weights, bias, scale
+        # Bundles saved before the sidecar files existed, or with stale ones.
+        weights, bias = self._linear_weights(bundle.classifier)
+        return weights, bias, None
+
+    @staticmethod
+    def _feature_count(bundle: _ModelBundle) -> int:
+        """
+        Width of the hstacked text + metadata matrix the bundle's vectorizers produce.
+        """
+        return len(bundle.text_vectorizer.vocabulary_) + len(bundle.meta_vectorizer.feature_names_)
+
+    def _save(self, bundle: _ModelBundle) -> None:
+        import joblib
+        import numpy as np
+
+        # A loaded bundle memory-maps the weights file, so each file is written beside
+        # the old one and swapped in; the mapping keeps reading the old inode.
+        if bundle.weights is not None:
+            _replace_file(self.weights_path, lambda handle: np.save(handle, bundle.weights))
+            _replace_file(self.bias_path, lambda handle: np.save(handle, bundle.bias))
+        else:
+            self.weights_path.unlink(missing_ok=True)
+            self.bias_path.unlink(missing_ok=True)
+        if bundle.scale is not None:
+            _replace_file(self.scale_path, lambda handle: np.save(handle, bundle.scale))
+        else:
+            self.scale_path.unlink(missing_ok=True)
+        # The arrays are already on disk; keep them out of the pickle.
+        stripped = replace(bundle, weights=None, bias=None, scale=None)
+        _replace_file(self.model_path, lambda handle: joblib.dump(stripped, handle))
+
+    @staticmethod
+    def _intern_labels(classes: Iterable[str]) -> tuple[str, ...]:
+        """
+        Interned label tuple, so predicted categories are the same str objects everywhere.
+        """
+        return tuple(sys.intern(str(label)) for label in classes)
+
+    @staticmethod
+    def _linear_weights(classifier) -> tuple[np.ndarray | None, np.ndarray | None]:
+        import numpy as np
+        from sklearn.linear_model import LogisticRegression
+
+        # Only multinomial logistic regression is a plain softmax over X @ coef_.T;
+        # anything else (e.g. the single-label DummyClassifier) keeps using predict_proba.
+        if not isinstance(classifier, LogisticRegression):
+            return None, None
+        coef = classifier.coef_
+        intercept = classifier.intercept_
+        if coef.shape[0] == 1:
+            # Binary models use a sigmoid, which equals a softmax over logits [0, z].
+            coef = np.vstack([np.zeros_like(coef), coef])
+            intercept = np.concatenate([np.zeros_like(intercept), intercept])
+        return np.ascontiguousarray(coef.T, dtype=np.float32), np.asarray(intercept, dtype=np.float32)
+
+    @staticmethod
+    def _quantize(weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Symmetric absmax int8 quantization with one scale per label (column).
+        """
+        import numpy as np
+
+        scale = np.abs(weights).max(axis=0) / 127.0
+        scale[scale == 0] = 1.0
+        quantized = np.round(weights / scale).astype(np.int8)
+        return quantized, scale.astype(np.float32)
+
+    @staticmethod
+    def _sparse_dot(matrix, weights: np.ndarray) -> np.ndarray:
+        """
+        X @ W for a CSR matrix X and dense (features x labels) W.
+        Only the weight rows for X's non-zero columns are gathered, so W is never copied
+        or upcast as a whole (scipy's sparse @ dense does both for int8/memmapped weights).
+        """
+        import numpy as np
+
+        gathered = weights[matrix.indices].astype(np.float32)
+        gathered *= matrix.data[:, None]
+        logits = np.zeros((matrix.shape[0], weights.shape[1]), dtype=np.float32)
+        nonempty = np.diff(matrix.indptr) > 0
+        if gathered.size:
+            logits[nonempty] = np.add.reduceat(gathered, matrix.indptr[:-1][nonempty], axis=0)
+        return logits
 
     @staticmethod
     def _meta_features(amount: float | None, date_value: date | None, account_type: str | None) -> dict[str, str]:
@@ -115,6 +247,9 @@ class SmartCategorizer:
 
     @staticmethod
     def _vectorizers() -> tuple[TfidfVectorizer, DictVectorizer]:
+        from sklearn.feature_extraction import DictVectorizer
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
         text_vectorizer = TfidfVectorizer(
             analyzer="char",
             ngram_range=(3, 5),
@@ -128,9 +263,26 @@ class SmartCategorizer:
     def _transform(self, texts: Sequence[str], metas: Sequence[dict[str, str]]):
         if not self._bundle:
             raise RuntimeError("Model not loaded.")
+        from scipy.sparse import hstack
+
         text_matrix = self._bundle.text_vectorizer.transform(texts)
         meta_matrix = self._bundle.meta_vectorizer.transform(metas)
-        return hstack([text_matrix, meta_matrix])
+        return hstack([text_matrix, meta_matrix], format="csr")
+
+    def _predict_proba(self, matrix) -> np.ndarray:
+        import numpy as np
+
+        bundle = self._bundle
+        if bundle.weights is None:
+            return bundle.classifier.predict_proba(matrix)
+        logits = self._sparse_dot(matrix, bundle.weights)
+        if bundle.scale is not None:
+            logits *= bundle.scale
+        logits += bundle.bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        return probs
 
     def predict(
         self,
@@ -141,39 +293,63 @@ class SmartCategorizer:
         account_type: str | None = None,
         threshold: float = AUTO_APPLY_THRESHOLD,
     ) -> PredictionResult:
-        normalized = normalize_description(description)
-        if not self._bundle:
-            return PredictionResult(
-                category=None,
-                confidence=None,
-                source="none",
-                top_categories=[],
-                normalized_description=normalized,
-            )
+        return self.predict_many([(description, amount, date_value, account_type)], threshold=threshold)[0]
 
-        features = self._meta_features(amount, date_value, account_type)
-        matrix = self._transform([normalized], [features])
-        probs = self._bundle.classifier.predict_proba(matrix)[0]
+    def predict_many(
+        self,
+        items: Sequence[PredictionInput],
+        *,
+        threshold: float = AUTO_APPLY_THRESHOLD,
+    ) -> list[PredictionResult]:
+        """
+        Predict categories for many transactions with a single vectorize + predict pass.
+        """
+        normalized = [normalize_description(description) for description, _, _, _ in items]
+        if not self._bundle or not items:
+            return [PredictionResult(None, None, "none", [], text) for text in normalized]
+
+        metas = [
+            self._meta_features(amount, date_value, account_type)
+            for _, amount, date_value, account_type in items
+        ]
+        import numpy as np
+
+        matrix = self._transform(normalized, metas)
+        probs_matrix = self._predict_proba(matrix)
         labels = self._bundle.labels
-        if len(probs) != len(labels):
-            return PredictionResult(None, None, "none", [], normalized)
-
-        top_indices = np.argsort(probs)[::-1]
-        top = [(labels[i], float(probs[i])) for i in top_indices[:5]]
-        best_label, best_conf = top[0]
-        source = "model" if best_conf >= threshold else "model_unconfident"
-        return PredictionResult(
-            category=best_label if best_conf >= threshold else None,
-            confidence=float(best_conf),
-            source=source,
-            top_categories=top,
-            normalized_description=normalized,
-        )
+        if probs_matrix.shape[1] != len(labels):
+            return [PredictionResult(None, None, "none", [], text) for text in normalized]
+
+        k = min(5, probs_matrix.shape[1])
+        results: list[PredictionResult] = []
+        for probs, text in zip(probs_matrix, normalized):
+            top_indices = np.argpartition(probs, -k)[-k:]
+            top_indices = top_indices[np.argsort(probs[top_indices])[::-1]]
+            top = [(labels[i], float(probs[i])) for i in top_indices]
+            best_label, best_conf = top[0]
+            source = "model" if best_conf >= threshold else "model_unconfident"
+            results.append(
+                PredictionResult(
+                    category=best_label if best_conf >= threshold else None,
+                    confidence=float(best_conf),
+                    source=source,
+                    top_categories=top,
+                    normalized_description=text,
+                )
+            )
+        return results
 
     def train(self, samples: Sequence[TrainingExample]) -> TrainReport:
         if not samples:
             return TrainReport(False, 0, [], None, None, 0, None)
 
+        import numpy as np
+        from scipy.sparse import hstack
+        from sklearn.dummy import DummyClassifier
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.metrics import accuracy_score, f1_score
+        from sklearn.model_selection import train_test_split
+
         texts = [normalize_description(s.description) for s in samples]
         metas = [self._meta_features(s.amount, s.date_value, s.account_type) for s in samples]
         labels = [s.category for s in samples]
@@ -187,6 +363,7 @@ class SmartCategorizer:
         accuracy = None
         macro_f1 = None
         heldout = 0
+        X_test = None
 
         unique_labels = set(labels)
         label_counts: dict[str, int] = {}
@@ -218,20 +395,34 @@ class SmartCategorizer:
             clf = LogisticRegression(max_iter=1200, n_jobs=-1, class_weight="balanced")
             clf.fit(X_full, y_full)
 
+        weights, bias = self._linear_weights(clf)
+        scale = None
+        if weights is not None:
+            # Only ship int8 weights when they pick the same label as float32 on held-out
+            # rows (or the training rows when there is no held-out split).
+            check_matrix = (X_test if X_test is not None else X_full).tocsr()
+            quantized, quantized_scale = self._quantize(weights)
+            float_pred = (self._sparse_dot(check_matrix, weights) + bias).argmax(axis=1)
+            quant_pred = (self._sparse_dot(check_matrix, quantized) * quantized_scale + bias).argmax(axis=1)
+            if np.mean(float_pred == quant_pred) >= QUANTIZATION_MIN_AGREEMENT:
+                weights, scale = quantized, quantized_scale
         bundle = _ModelBundle(
             text_vectorizer=text_vectorizer,
             meta_vectorizer=meta_vectorizer,
             classifier=clf,
-            labels=list(clf.classes_),
+            labels=self._intern_labels(clf.classes_),
             trained_at=datetime.utcnow(),
+            weights=weights,
+            bias=bias,
+            scale=scale,
         )
-        joblib.dump(bundle, self.model_path)
+        self._save(bundle)
         self._bundle = bundle
 
         return TrainReport(
             trained=True,
             samples=len(samples),
-            labels=bundle.labels,
+            labels=list(bundle.labels),
             accuracy=accuracy,
             macro_f1=macro_f1,
             heldout_samples=heldout,
@@ -244,18 +435,75 @@ class SmartCategorizer:
         return {
             "trained": True,
             "trained_at": self._bundle.trained_at.isoformat(),
-            "labels": self._bundle.labels,
+            "labels": list(self._bundle.labels),
             "model_path": str(self.model_path),
         }
 
 
-_SMART_CATEGORIZER = SmartCategorizer()
+def _replace_file(path: Path, write: Callable[[BinaryIO], None]) -> None:
+    """
+    Write `path` through a temporary file in the same directory and rename it into place.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            write(handle)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+# Training writes the shared model files, so runs go one at a time.
+_training_lock = threading.Lock()
+
+
+@cache
+def _categorizer() -> SmartCategorizer:
+    """
+    Shared categorizer, created (and its model loaded) on first use rather than at import.
+    """
+    return SmartCategorizer()
+
+
+def _build_rule_automaton():
+    """
+    Compile every fallback keyword into one Aho-Corasick automaton.
+    Each keyword maps to (priority, category) where priority is the rule's position in
+    CATEGORIZATION_RULES, so earlier-listed categories keep winning ties.
+    """
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for priority, (category, keywords) in enumerate(CATEGORIZATION_RULES.items()):
+        for keyword in keywords:
+            if keyword not in automaton:
+                automaton.add_word(keyword, (priority, category))
+    automaton.make_automaton()
+    return automaton
+
+
+_RULE_AUTOMATON = _build_rule_automaton()
+
+# Fallback when pyahocorasick isn't installed: one compiled alternation per category,
+# checked in rule order.
+_RULE_RE = {
+    category: re.compile("|".join(re.escape(keyword) for keyword in keywords))
+    for category, keywords in CATEGORIZATION_RULES.items()
+    if keywords
+}
 
 
 def _fallback_rule(description: str) -> str | None:
     lowered = (description or "").lower()
-    for category, keywords in CATEGORIZATION_RULES.items():
-        if any(keyword in lowered for keyword in keywords):
+    if _RULE_AUTOMATON is not None:
+        best: tuple[int, str] | None = None
+        for _, match in _RULE_AUTOMATON.iter(lowered):
+            if best is None or match[0] < best[0]:
+                best = match
+        return canonicalize_category(best[1]) if best else None
+    for category, pattern in _RULE_RE.items():
+        if pattern.search(lowered):
             return canonicalize_category(category)
     return None
 
@@ -270,27 +518,24 @@ def categorize_transaction(
     Predict the category for a transaction.
     Tries the ML model first; falls back to heuristic rules when unconfident.
     """
-    prediction = _SMART_CATEGORIZER.predict(
-        description, amount=amount, date_value=date_value, account_type=account_type
-    )
-    if prediction.category:
-        return canonicalize_category(prediction.category)
-    return _fallback_rule(description)
+    return categorize_transactions_bulk([(description, amount, date_value, account_type)])[0]
 
 
-def categorize_with_details(
-    description: str,
-    *,
-    amount: float | None = None,
-    date_value: date | None = None,
-    account_type: str | None = None,
-) -> PredictionResult:
+def categorize_transactions_bulk(items: Sequence[PredictionInput]) -> list[str | None]:
     """
-    Get prediction details including confidence and top categories.
+    Predict categories for many (description, amount, date, account_type) items in one model pass.
     """
-    prediction = _SMART_CATEGORIZER.predict(
-        description, amount=amount, date_value=date_value, account_type=account_type
-    )
+    predictions = _categorizer().predict_many(items)
+    categories: list[str | None] = []
+    for (description, _, _, _), prediction in zip(items, predictions):
+        if prediction.category:
+            categories.append(canonicalize_category(prediction.category))
+        else:
+            categories.append(_fallback_rule(description))
+    return categories
+
+
+def _apply_fallback(description: str, prediction: PredictionResult) -> PredictionResult:
     canonical_category = canonicalize_category(prediction.category)
     if canonical_category is None:
         fallback = _fallback_rule(description)
@@ -310,11 +555,31 @@ def categorize_with_details(
     return prediction
 
 
-def train_from_transactions(transactions: Iterable) -> TrainReport:
+def categorize_with_details(
+    description: str,
+    *,
+    amount: float | None = None,
+    date_value: date | None = None,
+    account_type: str | None = None,
+) -> PredictionResult:
     """
-    Train the model using transactions that already have categories.
-    Expects each item to have: description_raw, amount, date, account (with type), category.
+    Get prediction details including confidence and top categories.
+    """
+    return categorize_with_details_bulk([(description, amount, date_value, account_type)])[0]
+
+
+def categorize_with_details_bulk(items: Sequence[PredictionInput]) -> list[PredictionResult]:
     """
+    Batched variant of `categorize_with_details`; one vectorize + predict pass for all items.
+    """
+    predictions = _categorizer().predict_many(items)
+    return [
+        _apply_fallback(description, prediction)
+        for (description, _, _, _), prediction in zip(items, predictions)
+    ]
+
+
+def _samples_from_transactions(transactions: Iterable) -> list[TrainingExample]:
     samples: list[TrainingExample] = []
     for txn in transactions:
         category = canonicalize_category(txn.category)
@@ -325,15 +590,30 @@ def train_from_transactions(transactions: Iterable) -> TrainReport:
                 description=txn.description_raw or "",
                 amount=float(txn.amount) if txn.amount is not None else None,
                 date_value=txn.date,
-                account_type=getattr(getattr(txn, "account", None), "type", None),
+                account_type=(
+                    txn.account_type
+                    if hasattr(txn, "account_type")
+                    else getattr(getattr(txn, "account", None), "type", None)
+                ),
                 category=category,
             )
         )
-    return _SMART_CATEGORIZER.train(samples)
+    return samples
+
+
+def train_from_transactions(transactions: Iterable) -> TrainReport:
+    """
+    Train the model using transactions that already have categories.
+    Expects each item to have: description_raw, amount, date, category, and either
+    account_type or account (with type).
+    """
+    samples = _samples_from_transactions(transactions)
+    with _training_lock:
+        return _categorizer().train(samples)
 
 
 def get_categorizer_status() -> dict[str, str | int | list[str] | None]:
     """
     Return current model status/metadata.
     """
-    return _SMART_CATEGORIZER.status()
+    return _categorizer().status()
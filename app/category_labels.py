@@ -4,15 +4,19 @@ from __future__ import annotations
 Shared helpers for dealing with transaction category labels.
 """
 
-ACCOUNT_TRANSFER_CATEGORY = "Account Transfer"
-_TRANSFER_CATEGORY_ALIASES = {
+import sys
+from functools import lru_cache
+
+# Interned so canonicalized labels share identity with the model's (also interned) labels.
+ACCOUNT_TRANSFER_CATEGORY = sys.intern("Account Transfer")
+TRANSFER_CATEGORY_ALIASES = {
     ACCOUNT_TRANSFER_CATEGORY.lower(),
     "credit payment",
 }
 
-INVESTMENT_CATEGORY = "Investment"
+INVESTMENT_CATEGORY = sys.intern("Investment")
 _INVESTMENT_NORMALIZED = INVESTMENT_CATEGORY.lower()
-_INVESTMENT_CATEGORY_ALIASES = {
+INVESTMENT_CATEGORY_ALIASES = {
     _INVESTMENT_NORMALIZED,
     "investments",
     "investment contribution",
@@ -29,6 +33,7 @@ def _normalize(category: str | None) -> str:
     return (category or "").strip().lower()
 
 
+@lru_cache(maxsize=2048)
 def canonicalize_category(category: str | None) -> str | None:
     """
     Normalize category labels so we consistently store canonical names.
@@ -39,19 +44,19 @@ def canonicalize_category(category: str | None) -> str | None:
     if not trimmed:
         return None
     normalized = trimmed.lower()
-    if normalized in _TRANSFER_CATEGORY_ALIASES:
+    if normalized in TRANSFER_CATEGORY_ALIASES:
         return ACCOUNT_TRANSFER_CATEGORY
-    if normalized in _INVESTMENT_CATEGORY_ALIASES or normalized.startswith(_INVESTMENT_NORMALIZED):
+    if normalized in INVESTMENT_CATEGORY_ALIASES or normalized.startswith(_INVESTMENT_NORMALIZED):
         return INVESTMENT_CATEGORY
     return trimmed
 
 
 def is_transfer_category(category: str | None) -> bool:
-    return _normalize(category) in _TRANSFER_CATEGORY_ALIASES
+    return _normalize(category) in TRANSFER_CATEGORY_ALIASES
 
 
 def is_investment_category(category: str | None) -> bool:
     normalized = _normalize(category)
     if not normalized:
         return False
-    return normalized in _INVESTMENT_CATEGORY_ALIASES or normalized.startswith(_INVESTMENT_NORMALIZED)
+    return normalized in INVESTMENT_CATEGORY_ALIASES or normalized.startswith(_INVESTMENT_NORMALIZED)
@@ -1,52 +1,72 @@
 from __future__ import annotations
 
 import json
-import threading
 from pathlib import Path
-from typing import Optional
-
-from .text_utils import normalize_description
-
-OVERRIDES_PATH = Path(__file__).resolve().parent / "artifacts" / "category_overrides.json"
-_LOCK = threading.Lock()
 
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 
-def _ensure_path() -> None:
-    OVERRIDES_PATH.parent.mkdir(parents=True, exist_ok=True)
-
-
-def _load() -> dict[str, str]:
-    _ensure_path()
-    if OVERRIDES_PATH.exists():
-        try:
-            return json.loads(OVERRIDES_PATH.read_text())
-        except json.JSONDecodeError:
-            return {}
-    return {}
+from . import models
+from .text_utils import normalize_description
 
+try:
+    import orjson
+except ImportError:  # optional faster JSON codec
+    orjson = None
 
-def _save(data: dict[str, str]) -> None:
-    _ensure_path()
-    OVERRIDES_PATH.write_text(json.dumps(data, indent=2, sort_keys=True))
+# Overrides used to live in this file; it's imported into the category_overrides table once.
+LEGACY_OVERRIDES_PATH = Path(__file__).resolve().parent / "artifacts" / "category_overrides.json"
 
 
-def lookup_override(description: str) -> Optional[str]:
-    normalized = normalize_description(description)
+def record_override(db: Session, user_id: int, description: str | None, category: str | None) -> None:
+    """
+    Stage the user's override for the description; the caller commits.
+    """
+    normalized = normalize_description(description or "")
     if not normalized:
-        return None
-    with _LOCK:
-        overrides = _load()
-        return overrides.get(normalized)
+        return
+    override = db.get(models.CategoryOverride, {"user_id": user_id, "description_clean": normalized})
+    if category:
+        if override:
+            override.category = category
+        else:
+            db.add(models.CategoryOverride(user_id=user_id, description_clean=normalized, category=category))
+    elif override:
+        db.delete(override)
 
 
-def record_override(description: str | None, category: str | None) -> None:
-    normalized = normalize_description(description or "")
-    if not normalized:
+def import_legacy_overrides(db: Session) -> None:
+    """
+    Move overrides from the old JSON file into the table, keeping any rows already there.
+    The file was shared by every user, so each override goes to the users who have a
+    transaction with that description.
+    """
+    if not LEGACY_OVERRIDES_PATH.exists():
         return
-    with _LOCK:
-        overrides = _load()
-        if category:
-            overrides[normalized] = category
+    try:
+        if orjson is not None:
+            data = orjson.loads(LEGACY_OVERRIDES_PATH.read_bytes())
         else:
-            overrides.pop(normalized, None)
-        _save(overrides)
+            data = json.loads(LEGACY_OVERRIDES_PATH.read_text())
+    except json.JSONDecodeError:  # orjson.JSONDecodeError subclasses it
+        data = {}
+    data = {key: category for key, category in data.items() if key and category}
+    existing = {
+        (user_id, key)
+        for user_id, key in db.execute(
+            select(models.CategoryOverride.user_id, models.CategoryOverride.description_clean)
+        )
+    }
+    owners = db.execute(
+        select(models.Account.user_id, models.Transaction.description_clean)
+        .join(models.Account)
+        .where(models.Transaction.description_clean.in_(data))
+        .distinct()
+    )
+    db.add_all(
+        models.CategoryOverride(user_id=user_id, description_clean=key, category=data[key])
+        for user_id, key in owners
+        if (user_id, key) not in existing
+    )
+    db.commit()
+    LEGACY_OVERRIDES_PATH.rename(LEGACY_OVERRIDES_PATH.with_suffix(".json.imported"))
@@ -4,3 +4,6 @@ PLAID_CLIENT_ID: str = os.environ.get("PLAID_CLIENT_ID", "")
 PLAID_SECRET: str = os.environ.get("PLAID_SECRET", "")
 PLAID_ENV: str = os.environ.get("PLAID_ENV", "sandbox")
 PLAID_ENCRYPTION_KEY: str = os.environ.get("PLAID_ENCRYPTION_KEY", "")
+# Rounds for newly hashed passwords (passlib's pbkdf2_sha256 default); existing hashes
+# keep the rounds they were created with.
+PBKDF2_ITERATIONS: int = int(os.environ.get("PBKDF2_ITERATIONS", "29000"))
@@ -3,9 +3,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pathlib import Path
-from sqlalchemy import text
+from sqlalchemy import bindparam, delete, func, select, text, update
 
-from .database import Base, engine
+from .category_labels import canonicalize_category
+from .category_overrides import import_legacy_overrides
+from .database import Base, SessionLocal, engine
+from .text_utils import normalize_description
+from . import models
 from .routers import accounts, transactions, uploads, categorization, auth, plaid
 
 app = FastAPI(title="Finance Dashboard API")
@@ -26,30 +30,146 @@ app.include_router(auth.router)
 app.include_router(plaid.router)
 
 
+# (table, column, type) added after the initial schema shipped.
+_MIGRATION_COLUMNS = (
+    ("accounts", "plaid_item_id", "INTEGER"),
+    ("accounts", "plaid_account_id", "TEXT"),
+    ("transactions", "plaid_transaction_id", "TEXT"),
+)
+# (index, table, columns) for indexes declared after their table already existed.
+_MIGRATION_INDEXES = (
+    ("ix_transactions_description_clean", "transactions", "description_clean"),
+    ("ix_transactions_account_id_date", "transactions", "account_id, date"),
+    ("ix_accounts_user_id", "accounts", "user_id"),
+)
+
+
 def _migrate_db() -> None:
     """Add new columns to existing tables without Alembic."""
-    with engine.connect() as conn:
-        accounts_cols = [
-            row[1] for row in conn.execute(text("PRAGMA table_info(accounts)"))
-        ]
-        if "plaid_item_id" not in accounts_cols:
-            conn.execute(text("ALTER TABLE accounts ADD COLUMN plaid_item_id INTEGER"))
-        if "plaid_account_id" not in accounts_cols:
-            conn.execute(text("ALTER TABLE accounts ADD COLUMN plaid_account_id TEXT"))
+    tables = sorted({table for table, _, _ in _MIGRATION_COLUMNS} | {"category_overrides"})
+    with engine.begin() as conn:
+        # One round trip for every table's columns via the table-valued pragma.
+        existing = {
+            (table, column)
+            for table, column in conn.execute(
+                text(
+                    "SELECT m.name, p.name FROM sqlite_master AS m "
+                    "JOIN pragma_table_info(m.name) AS p "
+                    "WHERE m.type = 'table' AND m.name IN :tables"
+                ).bindparams(bindparam("tables", expanding=True)),
+                {"tables": tables},
+            )
+        }
+        for table, column, column_type in _MIGRATION_COLUMNS:
+            if (table, column) not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+        if ("category_overrides", "user_id") not in existing:
+            _rekey_category_overrides(conn)
+        _ensure_unique_plaid_transaction_id(conn)
+        for index, table, columns in _MIGRATION_INDEXES:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index} ON {table} ({columns})"))
+
 
-        txn_cols = [
-            row[1] for row in conn.execute(text("PRAGMA table_info(transactions)"))
+def _ensure_unique_plaid_transaction_id(conn) -> None:
+    """
+    Plaid sync inserts with ON CONFLICT (plaid_transaction_id), which needs a unique index
+    on the column. Tables created with it have one; where the column came from ALTER TABLE,
+    drop repeat imports (keeping the first) and add the index.
+    """
+    has_unique_index = conn.execute(
+        text(
+            "SELECT 1 FROM pragma_index_list('transactions') AS l WHERE l.\"unique\" "
+            "AND (SELECT group_concat(name) FROM pragma_index_info(l.name)) = 'plaid_transaction_id'"
+        )
+    ).first()
+    if has_unique_index:
+        return
+    conn.execute(
+        text(
+            "DELETE FROM transactions WHERE plaid_transaction_id IS NOT NULL AND id NOT IN "
+            "(SELECT MIN(id) FROM transactions WHERE plaid_transaction_id IS NOT NULL "
+            "GROUP BY plaid_transaction_id)"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_transactions_plaid_transaction_id "
+            "ON transactions (plaid_transaction_id)"
+        )
+    )
+
+
+def _rekey_category_overrides(conn) -> None:
+    """
+    category_overrides used to be keyed by description alone and shared by every user.
+    Rebuild it keyed by (user_id, description_clean), giving each override to the users
+    who have a transaction with that description.
+    """
+    conn.execute(text("ALTER TABLE category_overrides RENAME TO category_overrides_shared"))
+    models.CategoryOverride.__table__.create(conn)
+    conn.execute(
+        text(
+            "INSERT INTO category_overrides (user_id, description_clean, category) "
+            "SELECT DISTINCT a.user_id, o.description_clean, o.category "
+            "FROM category_overrides_shared AS o "
+            "JOIN transactions AS t ON t.description_clean = o.description_clean "
+            "JOIN accounts AS a ON a.id = t.account_id"
+        )
+    )
+    conn.execute(text("DROP TABLE category_overrides_shared"))
+
+
+def _backfill_description_clean() -> None:
+    """Fill description_clean for rows inserted before it was always populated."""
+    with SessionLocal() as db:
+        missing = db.query(models.Transaction.id, models.Transaction.description_raw).filter(
+            models.Transaction.description_clean.is_(None)
+        )
+        updates = [
+            {"id": txn_id, "description_clean": normalize_description(raw or "")}
+            for txn_id, raw in missing
         ]
-        if "plaid_transaction_id" not in txn_cols:
-            conn.execute(text("ALTER TABLE transactions ADD COLUMN plaid_transaction_id TEXT"))
+        if updates:
+            db.execute(update(models.Transaction), updates)
+            db.commit()
+
 
-        conn.commit()
+def _canonicalize_stored_categories() -> None:
+    """
+    Rewrite category labels stored before every write path canonicalized them, so
+    analytics can compare the column against the canonical labels directly.
+    """
+    with SessionLocal() as db:
+        for model in (models.Transaction, models.CategoryOverride):
+            table = model.__table__
+            # One UPDATE per distinct stale label rather than per row.
+            renames = [
+                {"raw": raw, "canonical": canonicalize_category(raw)}
+                for (raw,) in db.execute(select(table.c.category).distinct())
+                if raw is not None and canonicalize_category(raw) != raw
+            ]
+            if model is models.CategoryOverride:
+                # The column is NOT NULL; a blank override means none at all.
+                db.execute(delete(table).where(func.trim(table.c.category) == ""))
+                renames = [rename for rename in renames if rename["canonical"] is not None]
+            if renames:
+                db.execute(
+                    update(table)
+                    .where(table.c.category == bindparam("raw"))
+                    .values(category=bindparam("canonical")),
+                    renames,
+                )
+        db.commit()
 
 
 @app.on_event("startup")
 def on_startup():
     Base.metadata.create_all(bind=engine)
     _migrate_db()
+    _backfill_description_clean()
+    with SessionLocal() as db:
+        import_legacy_overrides(db)
+    _canonicalize_stored_categories()
 
 
 # Serve built frontend (if present)
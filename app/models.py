@@ -1,6 +1,7 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, ForeignKey, Index
+from sqlalchemy.orm import relationship, validates
+from .category_labels import canonicalize_category
 from .database import Base
 
 
@@ -35,7 +36,7 @@ class Account(Base):
     __tablename__ = "accounts"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
     type = Column(String, nullable=False)
     institution = Column(String, nullable=False)
@@ -59,7 +60,7 @@ class Transaction(Base):
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     date = Column(Date, nullable=False)
     description_raw = Column(String, nullable=False)
-    description_clean = Column(String, nullable=True)
+    description_clean = Column(String, nullable=True, index=True)
     amount = Column(Numeric(12, 2), nullable=False)
     currency = Column(String, nullable=False)
     category = Column(String, nullable=True)
@@ -68,3 +69,21 @@ class Transaction(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     account = relationship("Account", back_populates="transactions")
+
+    # Serves per-account listings and their date range filters / ordering.
+    __table_args__ = (Index("ix_transactions_account_id_date", "account_id", "date"),)
+
+    @validates("category")
+    def _canonical_category(self, key, value):
+        # Analytics compare this column to the canonical labels; the bulk insert and
+        # update paths canonicalize before writing.
+        return canonicalize_category(value)
+
+
+class CategoryOverride(Base):
+    __tablename__ = "category_overrides"
+
+    # Per user, keyed by the same normalization stored in transactions.description_clean.
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    description_clean = Column(String, primary_key=True)
+    category = Column(String, nullable=False)
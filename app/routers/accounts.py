@@ -1,12 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from .. import models, schemas
+from .. import models, schemas, summary_cache
 from ..database import get_db
 from ..account_types import parse_account_type
 from .auth import get_current_user
 
 router = APIRouter(prefix="/accounts", tags=["accounts"])
 
+_ACCOUNT_READ_COLUMNS = (
+    models.Account.id,
+    models.Account.name,
+    models.Account.type,
+    models.Account.institution,
+    models.Account.currency,
+    models.Account.latest_balance,
+    models.Account.plaid_account_id,
+)
+
+
+def _to_account_read(account) -> schemas.AccountRead:
+    """
+    Build the response from an account row or object, normalizing the stored type
+    without mutating (and dirtying) an ORM-tracked instance.
+    """
+    return schemas.AccountRead(
+        id=account.id,
+        name=account.name,
+        type=parse_account_type(account.type),
+        institution=account.institution,
+        currency=account.currency,
+        latest_balance=account.latest_balance,
+        plaid_account_id=account.plaid_account_id,
+    )
+
 
 @router.post("", response_model=schemas.AccountRead, status_code=201)
 def create_account(
@@ -20,16 +46,15 @@ def create_account(
     db_account = models.Account(**payload)
     db.add(db_account)
     db.commit()
+    summary_cache.invalidate(current_user.id)
     db.refresh(db_account)
     return db_account
 
 
 @router.get("", response_model=list[schemas.AccountRead])
 def list_accounts(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    accounts = db.query(models.Account).filter(models.Account.user_id == current_user.id).all()
-    for account in accounts:
-        account.type = parse_account_type(account.type).value
-    return accounts
+    rows = db.query(*_ACCOUNT_READ_COLUMNS).filter(models.Account.user_id == current_user.id).all()
+    return [_to_account_read(row) for row in rows]
 
 
 @router.get("/{account_id}", response_model=schemas.AccountRead)
@@ -45,8 +70,7 @@ def get_account(
     )
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
-    account.type = parse_account_type(account.type).value
-    return account
+    return _to_account_read(account)
 
 
 @router.delete("/{account_id}", status_code=204)
@@ -64,6 +88,7 @@ def delete_account(
         raise HTTPException(status_code=404, detail="Account not found")
     db.delete(account)
     db.commit()
+    summary_cache.invalidate(current_user.id)
     return None
 
 
@@ -74,4 +99,5 @@ def purge_accounts(db: Session = Depends(get_db), current_user: models.User = De
     """
     db.query(models.Account).filter(models.Account.user_id == current_user.id).delete()
     db.commit()
+    summary_cache.invalidate(current_user.id)
     return None
@@ -11,7 +11,6 @@ from ..security import create_access_token, get_password_hash, verify_password,
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-
 def get_user_by_email(db: Session, email: str) -> models.User | None:
     return db.query(models.User).filter(models.User.email == email).first()
 
@@ -35,7 +34,9 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except Exception:
         raise credentials_exception
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    # FastAPI resolves this dependency once per request, and db.get answers any repeat
+    # lookup in the same request's session from its identity map without a SELECT.
+    user = db.get(models.User, user_id)
     if not user:
         raise credentials_exception
     return user
@@ -12,6 +12,25 @@ from ..database import get_db
 router = APIRouter(prefix="/categorization", tags=["categorization"])
 
 
+def _training_rows(db: Session, *criteria):
+    """
+    Just the columns the trainer reads, with the account type joined in, rather than
+    full Transaction objects plus a lazy Account load.
+    """
+    return (
+        db.query(
+            models.Transaction.description_raw,
+            models.Transaction.amount,
+            models.Transaction.date,
+            models.Transaction.category,
+            models.Account.type.label("account_type"),
+        )
+        .join(models.Account)
+        .filter(models.Transaction.category.isnot(None), *criteria)
+        .all()
+    )
+
+
 @router.get("/status", response_model=schemas.CategorizationStatus)
 def status():
     return get_categorizer_status()
@@ -37,12 +56,7 @@ def predict(request: schemas.CategorizationPredictRequest):
 
 @router.post("/train", response_model=schemas.CategorizationTrainResponse)
 def train(db: Session = Depends(get_db)):
-    transactions = (
-        db.query(models.Transaction)
-        .join(models.Account)
-        .filter(models.Transaction.category.isnot(None))
-        .all()
-    )
+    transactions = _training_rows(db)
     if not transactions:
         raise HTTPException(status_code=400, detail="No categorized transactions available to train on.")
 
@@ -1,6 +1,9 @@
+import asyncio
 from decimal import Decimal
+from functools import lru_cache
 
 import plaid
+from cryptography.fernet import Fernet
 from fastapi import APIRouter, Depends, HTTPException
 from plaid.api import plaid_api as plaid_api_module
 from plaid.model.accounts_get_request import AccountsGetRequest
@@ -10,22 +13,27 @@ from plaid.model.link_token_create_request import LinkTokenCreateRequest
 from plaid.model.link_token_create_request_user import LinkTokenCreateRequestUser
 from plaid.model.products import Products
 from plaid.model.transactions_sync_request import TransactionsSyncRequest
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from .. import models, schemas
+from .. import models, schemas, summary_cache
 from ..config import PLAID_CLIENT_ID, PLAID_ENCRYPTION_KEY, PLAID_SECRET
 from ..database import get_db
 from ..plaid_client import get_plaid_api
 from .auth import get_current_user
-from .uploads import _build_transactions
+from .uploads import _build_transaction_values
 
 router = APIRouter(prefix="/plaid", tags=["plaid"])
 
 
+@lru_cache(maxsize=1)
 def _get_fernet():
+    """
+    Build the Fernet once; the missing-key error isn't cached, so it's raised on every call.
+    """
     if not PLAID_ENCRYPTION_KEY:
         raise HTTPException(status_code=503, detail="Plaid encryption key not configured")
-    from cryptography.fernet import Fernet
     return Fernet(PLAID_ENCRYPTION_KEY.encode())
 
 
@@ -37,18 +45,23 @@ def _decrypt(value: str) -> str:
     return _get_fernet().decrypt(value.encode()).decode()
 
 
+# (plaid type, plaid subtype) overrides, then the default for each plaid type.
+_ACCOUNT_TYPE_BY_SUBTYPE = {
+    ("depository", "checking"): "chequing",
+    ("depository", "chequing"): "chequing",
+}
+_ACCOUNT_TYPE_BY_TYPE = {
+    "depository": "savings",
+    "credit": "credit",
+    "loan": "loan",
+    "investment": "brokerage",
+}
+
+
 def _map_account_type(plaid_type: str, plaid_subtype: str | None) -> str:
     t = (plaid_type or "").lower()
     s = (plaid_subtype or "").lower()
-    if t == "depository":
-        return "chequing" if s in ("checking", "chequing") else "savings"
-    if t == "credit":
-        return "credit"
-    if t == "loan":
-        return "loan"
-    if t == "investment":
-        return "brokerage"
-    return "chequing"
+    return _ACCOUNT_TYPE_BY_SUBTYPE.get((t, s)) or _ACCOUNT_TYPE_BY_TYPE.get(t, "chequing")
 
 
 @router.post("/link-token", response_model=schemas.LinkTokenResponse)
@@ -130,12 +143,84 @@ async def exchange_token(
         db.add(account)
         created_accounts.append(account)
 
+    db.flush()
+    ids = [acc.id for acc in created_accounts]
     db.commit()
-    for acc in created_accounts:
-        db.refresh(acc)
+    summary_cache.invalidate(current_user.id)
+    # Reload every expired row with one SELECT instead of a refresh per row.
+    db.scalars(select(models.Account).where(models.Account.id.in_(ids))).all()
     return created_accounts
 
 
+def _fetch_sync_pages(plaid_client, access_token: str, cursor: str):
+    """
+    Page through transactions/sync from `cursor`. Blocking; run it off the event loop.
+    Returns (added, modified, removed, next_cursor).
+    """
+    added, modified, removed = [], [], []
+    has_more = True
+    while has_more:
+        req_kwargs: dict = {"access_token": access_token}
+        if cursor:
+            req_kwargs["cursor"] = cursor
+        response = plaid_client.transactions_sync(TransactionsSyncRequest(**req_kwargs))
+        added.extend(response.added)
+        modified.extend(response.modified)
+        removed.extend(response.removed)
+        has_more = response.has_more
+        cursor = response.next_cursor
+    return added, modified, removed, cursor
+
+
+def _apply_sync(db: Session, account: models.Account, added, modified, removed) -> dict[str, int]:
+    """
+    Stage one account's share of a sync page set; the caller commits.
+    """
+    plaid_account_id = account.plaid_account_id
+    account_added = [t for t in added if t.account_id == plaid_account_id]
+    account_modified = [t for t in modified if t.account_id == plaid_account_id]
+    account_removed_ids = [t.transaction_id for t in removed if t.account_id == plaid_account_id]
+
+    # Collect every new Plaid transaction and build them in one batch so categorization
+    # runs a single model pass for the whole sync.
+    rows: list[dict] = []
+    for plaid_txn in account_added:
+        tid = plaid_txn.transaction_id
+        # Plaid sign convention: positive = debit/outflow; negate to match our sign convention
+        amount = -float(plaid_txn.amount)
+        rows.append(
+            {
+                "date": str(plaid_txn.date),
+                "description": plaid_txn.name or "Transaction",
+                "amount": amount,
+                "plaid_transaction_id": tid,
+            }
+        )
+
+    # Already-imported transactions are skipped by the unique plaid_transaction_id index
+    # rather than by loading every existing id first.
+    values, _ = _build_transaction_values(account, rows)
+    added_ids = []
+    if values:
+        added_ids = db.scalars(
+            sqlite_insert(models.Transaction)
+            .on_conflict_do_nothing(index_elements=[models.Transaction.plaid_transaction_id])
+            .returning(models.Transaction.id),
+            values,
+        ).all()
+
+    if account_removed_ids:
+        db.query(models.Transaction).filter(
+            models.Transaction.plaid_transaction_id.in_(account_removed_ids)
+        ).delete(synchronize_session=False)
+
+    return {
+        "added": len(added_ids),
+        "modified": len(account_modified),
+        "removed": len(account_removed_ids),
+    }
+
+
 @router.post("/sync/{account_id}", response_model=schemas.PlaidSyncResponse)
 async def sync_account(
     account_id: int,
@@ -159,76 +244,60 @@ async def sync_account(
     access_token = _decrypt(plaid_item.access_token)
     plaid_client = get_plaid_api()
 
-    all_added = []
-    all_modified = []
-    all_removed = []
-    cursor = plaid_item.cursor or ""
-
     try:
-        has_more = True
-        while has_more:
-            req_kwargs: dict = {"access_token": access_token}
-            if cursor:
-                req_kwargs["cursor"] = cursor
-            response = plaid_client.transactions_sync(TransactionsSyncRequest(**req_kwargs))
-            all_added.extend(response.added)
-            all_modified.extend(response.modified)
-            all_removed.extend(response.removed)
-            has_more = response.has_more
-            cursor = response.next_cursor
+        added, modified, removed, cursor = await asyncio.to_thread(
+            _fetch_sync_pages, plaid_client, access_token, plaid_item.cursor or ""
+        )
     except plaid.ApiException as e:
         raise HTTPException(status_code=400, detail=f"Plaid sync error: {e.body}")
 
-    plaid_account_id = account.plaid_account_id
-    account_added = [t for t in all_added if t.account_id == plaid_account_id]
-    account_modified = [t for t in all_modified if t.account_id == plaid_account_id]
-    account_removed_ids = [t.transaction_id for t in all_removed if t.account_id == plaid_account_id]
-
-    # Fetch existing Plaid transaction IDs to deduplicate
-    existing_ids: set[str] = set(
-        row[0]
-        for row in db.query(models.Transaction.plaid_transaction_id)
-        .filter(
-            models.Transaction.account_id == account_id,
-            models.Transaction.plaid_transaction_id.isnot(None),
-        )
+    counts = _apply_sync(db, account, added, modified, removed)
+    plaid_item.cursor = cursor
+    db.commit()
+    summary_cache.invalidate(current_user.id)
+    return counts
+
+
+@router.post("/sync-all", response_model=schemas.PlaidSyncResponse)
+async def sync_all_accounts(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Sync every linked account. Each item's pages are fetched sequentially (the cursor
+    chains them) but items are fetched concurrently; DB writes stay on this session.
+    """
+    plaid_items = db.query(models.PlaidItem).filter(models.PlaidItem.user_id == current_user.id).all()
+    accounts = (
+        db.query(models.Account)
+        .filter(models.Account.user_id == current_user.id, models.Account.plaid_item_id.isnot(None))
         .all()
     )
+    plaid_client = get_plaid_api()
 
-    # Build one transaction at a time so we can attach plaid_transaction_id
-    new_transactions: list[models.Transaction] = []
-    for plaid_txn in account_added:
-        tid = plaid_txn.transaction_id
-        if tid in existing_ids:
-            continue
-        # Plaid sign convention: positive = debit/outflow; negate to match our sign convention
-        amount = -float(plaid_txn.amount)
-        row = {
-            "date": str(plaid_txn.date),
-            "description": plaid_txn.name or "Transaction",
-            "amount": amount,
-        }
-        built, _ = _build_transactions(account, [row])
-        if built:
-            built[0].plaid_transaction_id = tid
-            new_transactions.append(built[0])
-        existing_ids.add(tid)
-
-    db.add_all(new_transactions)
-
-    if account_removed_ids:
-        db.query(models.Transaction).filter(
-            models.Transaction.plaid_transaction_id.in_(account_removed_ids)
-        ).delete(synchronize_session=False)
+    try:
+        results = await asyncio.gather(
+            *(
+                asyncio.to_thread(
+                    _fetch_sync_pages, plaid_client, _decrypt(item.access_token), item.cursor or ""
+                )
+                for item in plaid_items
+            )
+        )
+    except plaid.ApiException as e:
+        raise HTTPException(status_code=400, detail=f"Plaid sync error: {e.body}")
 
-    plaid_item.cursor = cursor
+    totals = {"added": 0, "modified": 0, "removed": 0}
+    for item, (added, modified, removed, cursor) in zip(plaid_items, results):
+        for account in accounts:
+            if account.plaid_item_id != item.id or not account.plaid_account_id:
+                continue
+            for key, value in _apply_sync(db, account, added, modified, removed).items():
+                totals[key] += value
+        item.cursor = cursor
     db.commit()
-
-    return {
-        "added": len(new_transactions),
-        "modified": len(account_modified),
-        "removed": len(account_removed_ids),
-    }
+    summary_cache.invalidate(current_user.id)
+    return totals
 
 
 @router.get("/items", response_model=list[schemas.PlaidItemRead])
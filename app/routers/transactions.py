@@ -1,24 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import threading
+from datetime import MAXYEAR, MINYEAR, date
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import extract, func
+from sqlalchemy import and_, case, extract, false, func, or_, select, update
 
-from .. import models, schemas
-from ..database import get_db
+from .. import models, schemas, summary_cache
+from ..account_types import CREDIT_ACCOUNT_TYPES
+from ..database import SessionLocal, get_db
 from ..category_labels import canonicalize_category
 from ..category_overrides import record_override
-from ..categorization import categorize_transaction, train_from_transactions
-from ..transaction_logic import normalize_transaction_amount
+from ..categorization import categorize_transactions_bulk, train_from_transactions
+from ..text_utils import normalize_description
+from ..transaction_logic import amount_sign_factors
 from ..services.transaction_metrics import (
-    aggregate_transactions,
+    AggregateTotals,
+    aggregate_totals_columns,
     build_category_breakdown,
-    calculate_net_worth,
-    filter_transactions_by_kind,
+    transaction_kind_filter,
 )
 from .auth import get_current_user
+from .categorization import _training_rows
+from .uploads import _insert_transactions
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
 
+def _date_filters(year: int | None, month: int | None) -> list:
+    """
+    Year/month criteria as half-open date ranges, so an index on date can be used.
+    A month without a year matches every year and has no single range.
+    """
+    if year is None:
+        return [] if month is None else [extract("month", models.Transaction.date) == month]
+    if not MINYEAR <= year < MAXYEAR:
+        return [false()]
+    if month is None:
+        start, end = date(year, 1, 1), date(year + 1, 1, 1)
+    else:
+        start = date(year, month, 1)
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return [models.Transaction.date >= start, models.Transaction.date < end]
+
+
+def _grouped_totals(db: Session, user_id: int, year: int | None, month: int | None):
+    """
+    Sum amounts per (account type, category, sign) in SQL. Classification only depends
+    on those three, so these few rows replace loading every transaction.
+    """
+    sign = case((models.Transaction.amount > 0, 1), (models.Transaction.amount < 0, -1), else_=0)
+    query = (
+        db.query(models.Account.type, models.Transaction.category, func.sum(models.Transaction.amount))
+        .join(models.Account)
+        .filter(models.Account.user_id == user_id, *_date_filters(year, month))
+    )
+    return query.group_by(models.Account.type, models.Transaction.category, sign).all()
+
+
+def _summary_totals(db: Session, user_id: int, year: int | None, month: int | None) -> AggregateTotals:
+    income, expenses, invested = (
+        db.query(*aggregate_totals_columns())
+        .select_from(models.Transaction)
+        .join(models.Account)
+        .filter(models.Account.user_id == user_id, *_date_filters(year, month))
+        .one()
+    )
+    return AggregateTotals(income=float(income), expenses=float(expenses), invested=float(invested))
+
+
+def _net_worth(db: Session, user_id: int, year: int | None, month: int | None) -> float:
+    """
+    Signed sum of account balances as one scalar query. An account's balance is its
+    latest_balance, else the sum of its transactions; credit-type accounts subtract.
+    """
+    balances = (
+        select(
+            models.Account.type.label("type"),
+            func.coalesce(
+                models.Account.latest_balance, func.coalesce(func.sum(models.Transaction.amount), 0)
+            ).label("balance"),
+        )
+        .outerjoin(models.Transaction)
+        .where(models.Account.user_id == user_id, *_date_filters(year, month))
+        .group_by(models.Account.id, models.Account.type, models.Account.latest_balance)
+        .subquery()
+    )
+    # parse_account_type matches case-insensitively, so compare lowered values here too.
+    is_credit = func.lower(balances.c.type).in_([atype.value for atype in CREDIT_ACCOUNT_TYPES])
+    signed = case((is_credit, -balances.c.balance), else_=balances.c.balance)
+    return float(db.scalar(select(func.coalesce(func.sum(signed), 0))))
+
 
 @router.post("", response_model=list[schemas.TransactionRead], status_code=201)
 def create_transactions(
@@ -29,31 +101,28 @@ def create_transactions(
     if not transactions:
         raise HTTPException(status_code=400, detail="No transactions provided")
     account_ids = {txn.account_id for txn in transactions}
-    accounts = (
-        db.query(models.Account)
+    account_types = dict(
+        db.query(models.Account.id, models.Account.type)
         .filter(models.Account.id.in_(account_ids), models.Account.user_id == current_user.id)
         .all()
     )
-    account_map = {account.id: account for account in accounts}
-    missing = account_ids - set(account_map.keys())
+    missing = account_ids - account_types.keys()
     if missing:
         raise HTTPException(status_code=400, detail=f"Unknown account ids: {sorted(missing)}")
-    db_transactions: list[models.Transaction] = []
+    payloads: list[dict] = []
     for txn in transactions:
-        payload = txn.model_dump()
+        # TransactionCreate holds only flat scalar fields, so a shallow copy of the field
+        # values equals model_dump() without its serializer pass.
+        payload = dict(txn.__dict__)
         payload["category"] = canonicalize_category(payload.get("category"))
-        account = account_map[payload["account_id"]]
-        payload["amount"] = normalize_transaction_amount(
-            payload["amount"],
-            account.type,
-            payload["category"],
-        )
-        db_transactions.append(models.Transaction(**payload))
-    db.add_all(db_transactions)
-    db.commit()
-    for txn in db_transactions:
-        db.refresh(txn)
-    return db_transactions
+        if not payload.get("description_clean"):
+            payload["description_clean"] = normalize_description(payload["description_raw"])
+        positive, negative = amount_sign_factors(account_types[payload["account_id"]], payload["category"])
+        payload["amount"] *= positive if payload["amount"] >= 0 else negative
+        payloads.append(payload)
+    created = _insert_transactions(db, payloads)
+    summary_cache.invalidate(current_user.id)
+    return created
 
 
 @router.get("", response_model=list[schemas.TransactionRead])
@@ -61,9 +130,16 @@ def list_transactions(
     account_id: int | None = Query(default=None),
     year: int | None = Query(default=None),
     month: int | None = Query(default=None, ge=1, le=12),
+    limit: int | None = Query(default=None, ge=1, le=500),
+    after_date: date | None = Query(default=None),
+    after_id: int | None = Query(default=None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
+    """
+    Newest first. With `limit`, pass the last row's date and id as `after_date` /
+    `after_id` to get the next page (keyset pagination, so deep pages stay cheap).
+    """
     query = (
         db.query(models.Transaction)
         .join(models.Account)
@@ -71,18 +147,30 @@ def list_transactions(
     )
     if account_id is not None:
         query = query.filter(models.Transaction.account_id == account_id)
-    if year is not None:
-        query = query.filter(extract("year", models.Transaction.date) == year)
-    if month is not None:
-        query = query.filter(extract("month", models.Transaction.date) == month)
-    return query.order_by(models.Transaction.date.desc()).all()
+    query = query.filter(*_date_filters(year, month))
+    if after_date is not None:
+        # Rows after (after_date, after_id) in "date desc, id asc" order.
+        later_same_day = (
+            and_(models.Transaction.date == after_date, models.Transaction.id > after_id)
+            if after_id is not None
+            else false()
+        )
+        query = query.filter(or_(models.Transaction.date < after_date, later_same_day))
+    query = query.order_by(models.Transaction.date.desc(), models.Transaction.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def _in_own_session(query_fn, *args):
+    with SessionLocal() as session:
+        return query_fn(session, *args)
 
 
 @router.get("/summary", response_model=schemas.TransactionSummary)
-def get_transaction_summary(
+async def get_transaction_summary(
     year: int | None = Query(default=None),
     month: int | None = Query(default=None, ge=1, le=12),
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """
@@ -92,42 +180,21 @@ def get_transaction_summary(
     - account transfers are neutralized
     - investment contributions (category or account-type) tracked separately
     """
-    rows = (
-        db.query(models.Transaction, models.Account.type)
-        .join(models.Account)
-        .filter(models.Account.user_id == current_user.id)
-        .all()
+    return await summary_cache.cached_async(
+        current_user.id, ("summary", year, month), lambda: _build_summary(current_user.id, year, month)
     )
-    if year is not None:
-        rows = [(txn, atype) for txn, atype in rows if txn.date.year == year]
-    if month is not None:
-        rows = [(txn, atype) for txn, atype in rows if txn.date.month == month]
-
-    totals = aggregate_transactions(rows)
 
-    net_flow = totals.income + totals.expenses - totals.invested
-    savings_rate = net_flow / totals.income if totals.income > 0 else 0.0
 
-    balance_query = (
-        db.query(
-            models.Account.id,
-            models.Account.type,
-            models.Account.latest_balance,
-            func.coalesce(func.sum(models.Transaction.amount), 0),
-        )
-        .outerjoin(models.Transaction)
-        .filter(models.Account.user_id == current_user.id)
+async def _build_summary(user_id: int, year: int | None, month: int | None) -> schemas.TransactionSummary:
+    # The two queries are independent, so run them concurrently, each on its own
+    # session (a Session can't be shared across threads).
+    totals, net_worth = await asyncio.gather(
+        asyncio.to_thread(_in_own_session, _summary_totals, user_id, year, month),
+        asyncio.to_thread(_in_own_session, _net_worth, user_id, year, month),
     )
-    if year is not None:
-        balance_query = balance_query.filter(extract("year", models.Transaction.date) == year)
-    if month is not None:
-        balance_query = balance_query.filter(extract("month", models.Transaction.date) == month)
-
-    balances = balance_query.group_by(
-        models.Account.id, models.Account.type, models.Account.latest_balance
-    ).all()
 
-    net_worth = calculate_net_worth(balances)
+    net_flow = totals.income + totals.expenses - totals.invested
+    savings_rate = net_flow / totals.income if totals.income > 0 else 0.0
 
     return schemas.TransactionSummary(
         total_income=totals.income,
@@ -151,18 +218,11 @@ def get_expenses_by_category(
     """
     Get a summary of expenses by category for a given year and month.
     """
-    rows = (
-        db.query(models.Transaction, models.Account.type)
-        .join(models.Account)
-        .filter(models.Account.user_id == current_user.id)
-        .all()
+    return summary_cache.cached(
+        current_user.id,
+        ("by-category", year, month),
+        lambda: build_category_breakdown(_grouped_totals(db, current_user.id, year, month)),
     )
-    if year is not None:
-        rows = [(txn, atype) for txn, atype in rows if txn.date.year == year]
-    if month is not None:
-        rows = [(txn, atype) for txn, atype in rows if txn.date.month == month]
-
-    return build_category_breakdown(rows)
 
 
 @router.delete("/dev/purge", status_code=204)
@@ -170,17 +230,20 @@ def purge_all_transactions(db: Session = Depends(get_db), current_user: models.U
     """
     DEVELOPMENT ONLY: delete every recorded transaction.
     """
-    accounts = db.query(models.Account).filter(models.Account.user_id == current_user.id).all()
-    account_ids = [acct.id for acct in accounts]
+    account_ids = db.scalars(select(models.Account.id).where(models.Account.user_id == current_user.id)).all()
     if account_ids:
         db.query(models.Transaction).filter(models.Transaction.account_id.in_(account_ids)).delete()
         db.query(models.Account).filter(models.Account.id.in_(account_ids)).update(
             {models.Account.latest_balance: None}
         )
     db.commit()
+    summary_cache.invalidate(current_user.id)
     return None
 
 
+_RECATEGORIZE_BATCH_SIZE = 1000
+
+
 @router.post("/dev/re-categorize", status_code=200)
 def recategorize_transactions(
     db: Session = Depends(get_db),
@@ -188,28 +251,65 @@ def recategorize_transactions(
 ):
     """
     DEVELOPMENT ONLY: re-run categorization rules for all transactions.
+    The user's overrides win over the model; they're joined in on the indexed description_clean.
     """
-    transactions = (
-        db.query(models.Transaction)
+    rows = db.execute(
+        select(
+            models.Transaction.id,
+            models.Transaction.description_raw,
+            models.Transaction.amount,
+            models.Transaction.date,
+            models.Transaction.category,
+            models.Account.type,
+            models.CategoryOverride.category,
+        )
         .join(models.Account)
-        .filter(models.Account.user_id == current_user.id)
-        .all()
+        .outerjoin(
+            models.CategoryOverride,
+            and_(
+                models.CategoryOverride.user_id == current_user.id,
+                models.CategoryOverride.description_clean == models.Transaction.description_clean,
+            ),
+        )
+        .where(models.Account.user_id == current_user.id)
+        .execution_options(yield_per=_RECATEGORIZE_BATCH_SIZE)
     )
-    updated = 0
-    for txn in transactions:
-        account = txn.account
-        account_type_value = account.type if account else None
-        new_category = categorize_transaction(
-            txn.description_raw or "",
-            amount=txn.amount if txn.amount is not None else None,
-            date_value=txn.date,
-            account_type=account_type_value,
+    # Stream the rows and categorize one batch at a time; only the changed
+    # (id, category) pairs are kept, and they go out as one executemany UPDATE
+    # once the read cursor is done.
+    updates: list[dict] = []
+    total = 0
+    for batch in rows.partitions():
+        total += len(batch)
+        predicted = categorize_transactions_bulk(
+            [
+                (description_raw or "", amount, date_value, account_type)
+                for _, description_raw, amount, date_value, _, account_type, _ in batch
+            ]
+        )
+        updates.extend(
+            {"id": txn_id, "category": new_category}
+            for (txn_id, _, _, _, category, _, override), prediction in zip(batch, predicted)
+            if category != (new_category := override or prediction)
         )
-        if txn.category != new_category:
-            txn.category = new_category
-            updated += 1
+    if updates:
+        db.execute(update(models.Transaction), updates)
     db.commit()
-    return {"updated": updated, "total": len(transactions)}
+    summary_cache.invalidate(current_user.id)
+    return {"updated": len(updates), "total": total}
+
+
+# Users with a retrain queued but not yet started; PATCHes in the meantime share it.
+_retrain_queued: set[int] = set()
+_retrain_lock = threading.Lock()
+
+
+def _retrain_for_user(user_id: int) -> None:
+    with _retrain_lock:
+        _retrain_queued.discard(user_id)
+    with SessionLocal() as db:
+        categorized = _training_rows(db, models.Account.user_id == user_id)
+    train_from_transactions(categorized)
 
 
 @router.patch(
@@ -220,11 +320,12 @@ def recategorize_transactions(
 def update_transaction_category(
     transaction_id: int,
     payload: schemas.TransactionCategoryUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """
-    Update a transaction's category and retrain using all categorized transactions.
+    Update a transaction's category and queue a retrain on all categorized transactions.
     """
     txn = (
         db.query(models.Transaction)
@@ -236,34 +337,19 @@ def update_transaction_category(
         raise HTTPException(status_code=404, detail="Transaction not found")
 
     txn.category = canonicalize_category(payload.category)
-    record_override(txn.description_raw or "", txn.category)
+    record_override(db, current_user.id, txn.description_raw or "", txn.category)
     db.commit()
+    summary_cache.invalidate(current_user.id)
     db.refresh(txn)
 
-    categorized = (
-        db.query(models.Transaction)
-        .join(models.Account)
-        .filter(models.Transaction.category.isnot(None), models.Account.user_id == current_user.id)
-        .all()
-    )
-    training_report = train_from_transactions(categorized)
-    if not training_report.trained:
-        raise HTTPException(status_code=400, detail="Retraining did not run. Provide categorized data.")
-
-    return schemas.TransactionCategoryUpdateResponse(
-        transaction=txn,
-        training=schemas.CategorizationTrainResponse(
-            trained=training_report.trained,
-            samples=training_report.samples,
-            labels=training_report.labels,
-            accuracy=training_report.accuracy,
-            macro_f1=training_report.macro_f1,
-            heldout_samples=training_report.heldout_samples,
-            saved_to=training_report.saved_to,
-        )
-        if training_report
-        else None,
-    )
+    # Retraining takes seconds, so it runs after the response is sent and `training`
+    # is left unset.
+    with _retrain_lock:
+        queued = current_user.id in _retrain_queued
+        _retrain_queued.add(current_user.id)
+    if not queued:
+        background_tasks.add_task(_retrain_for_user, current_user.id)
+    return schemas.TransactionCategoryUpdateResponse(transaction=txn)
 
 
 @router.get("/breakdown", response_model=list[schemas.TransactionRead])
@@ -274,16 +360,14 @@ def get_transaction_breakdown(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    rows = (
-        db.query(models.Transaction, models.Account.type)
+    return (
+        db.query(models.Transaction)
         .join(models.Account)
-        .filter(models.Account.user_id == current_user.id)
+        .filter(
+            models.Account.user_id == current_user.id,
+            *_date_filters(year, month),
+            transaction_kind_filter(kind),
+        )
+        .order_by(models.Transaction.id)
         .all()
     )
-
-    if year is not None:
-        rows = [(txn, atype) for txn, atype in rows if txn.date.year == year]
-    if month is not None:
-        rows = [(txn, atype) for txn, atype in rows if txn.date.month == month]
-
-    return filter_transactions_by_kind(rows, kind)
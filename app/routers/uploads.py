@@ -1,98 +1,168 @@
+import csv
 from collections.abc import Iterable
+from datetime import date
 from decimal import Decimal
-from io import StringIO
-from typing import Any
+from itertools import repeat
+from typing import Any, BinaryIO
 
 import pandas as pd
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 from ..database import get_db
-from .. import models, schemas
-from ..categorization import categorize_with_details
+from .. import models, schemas, summary_cache
+from ..categorization import categorize_with_details_bulk
 from ..account_types import AccountType, parse_account_type
 from ..services.pdf_ingestion import PDFTransactionExtractor, TransactionRow
 from ..category_labels import canonicalize_category
-from ..transaction_logic import normalize_transaction_amount
+from ..transaction_logic import amount_sign_factors
 from .auth import get_current_user
 
 router = APIRouter(prefix="/uploads", tags=["uploads"])
 _pdf_extractor = PDFTransactionExtractor()
 
+_HEADER_DELETE = str.maketrans("", "", " _")
+
+
 def _normalize_header(name: str) -> str:
-    return (
-        (name or "")
-        .strip()
-        .lower()
-        .replace(" ", "")
-        .replace("_", "")
-    )
+    return (name or "").strip().lower().translate(_HEADER_DELETE)
 
 PAYMENT_KEYWORDS = {}
 
-def _build_transactions(account: models.Account, rows: Iterable[Any]):
-    account_type = parse_account_type(account.type)
-    transactions: list[models.Transaction] = []
-    last_balance: Decimal | None = None
+def _frame_from_records(rows: Iterable[Any]) -> pd.DataFrame:
+    """
+    Lay PDF rows or Plaid dicts out as columns so they go through _parse_frame like CSVs.
+    """
+    columns: dict[str, list] = {
+        "date": [],
+        "description": [],
+        "amount": [],
+        "balance": [],
+        "plaid_transaction_id": [],
+    }
     for row in rows:
         if isinstance(row, TransactionRow):
-            description = row.description.strip()
-            date_value = row.date
-            amount_value = row.amount
-            balance_value = row.balance
+            values = (row.date, row.description, row.amount, row.balance, None)
         else:
-            description = (row.get("description") or "").strip()
-            date_value = row.get("date")
-            amount_value = row.get("amount")
-            balance_value = row.get("balance")
+            values = (
+                row.get("date"),
+                row.get("description") or "",
+                row.get("amount"),
+                row.get("balance"),
+                row.get("plaid_transaction_id"),
+            )
+        for column, value in zip(columns.values(), values):
+            column.append(value)
+    return pd.DataFrame(columns, dtype=object)
+
+
+def _parse_frame(df: pd.DataFrame) -> tuple[list[tuple[str, date, Decimal, str | None]], Decimal | None]:
+    """
+    Drop rows without a description, date or amount and convert the rest column-wise.
+    Returns (description, date, amount, plaid_transaction_id) rows and the last balance.
+    """
+    df = df.assign(
+        description=df["description"].astype(str).str.strip(),
+        # "mixed" parses each string on its own, as Plaid/PDF values aren't one format.
+        date=pd.to_datetime(df["date"], errors="coerce", format="mixed"),
+    )
+    df = df[df["description"] != ""].dropna(subset=["date", "amount"])
+    # tolist() hands back Python scalars; Decimal rejects numpy ints.
+    amounts = map(Decimal, df["amount"].tolist())
+    plaid_ids = df["plaid_transaction_id"].tolist() if "plaid_transaction_id" in df else repeat(None)
+    parsed_rows = list(zip(df["description"].tolist(), df["date"].dt.date.tolist(), amounts, plaid_ids))
 
-        if not description or date_value is None or amount_value is None:
-            continue
+    last_balance: Decimal | None = None
+    if "balance" in df:
+        balances = df["balance"].dropna()
+        if not balances.empty:
+            last_balance = Decimal(balances.tolist()[-1])
+    return parsed_rows, last_balance
 
-        parsed_date = pd.to_datetime(date_value, errors="coerce")
-        if pd.isna(parsed_date):
-            continue
 
-        amount_value = Decimal(amount_value)
-        prediction = categorize_with_details(
-            description,
-            amount=amount_value,
-            date_value=parsed_date.date(),
-            account_type=account_type.value,
-        )
+def _build_transaction_values(account: models.Account, rows: pd.DataFrame | Iterable[Any]):
+    """
+    Column values for each parseable row, for callers that insert in bulk.
+    """
+    account_type = parse_account_type(account.type)
+    if not isinstance(rows, pd.DataFrame):
+        rows = _frame_from_records(rows)
+    parsed_rows, last_balance = _parse_frame(rows)
+
+    # Categorize the whole batch with one model pass instead of once per row.
+    predictions = categorize_with_details_bulk(
+        [
+            (description, amount_value, date_value, account_type.value)
+            for description, date_value, amount_value, _ in parsed_rows
+        ]
+    )
+
+    values: list[dict[str, Any]] = []
+    for (description, date_value, amount_value, plaid_transaction_id), prediction in zip(parsed_rows, predictions):
         category = canonicalize_category(prediction.category)
-        amount_value = normalize_transaction_amount(amount_value, account_type.value, category)
-        
+        # Cached per (account type, category): the sign rule is a flip or a no-op.
+        positive, negative = amount_sign_factors(account_type.value, category)
+        if (positive if amount_value >= 0 else negative) < 0:
+            amount_value = -amount_value
+
         txn_data = schemas.TransactionCreate(
             account_id=account.id,
-            date=parsed_date.date(),
+            date=date_value,
             description_raw=description,
             description_clean=prediction.normalized_description,
             amount=amount_value,
             currency=account.currency,
             category=category,
         )
-        transactions.append(models.Transaction(**txn_data.model_dump()))
+        values.append({**txn_data.model_dump(), "plaid_transaction_id": plaid_transaction_id})
+    return values, last_balance
+
+
+def _insert_transactions(db: Session, values: list[dict[str, Any]]) -> list[models.Transaction]:
+    """
+    Insert with one multi-row INSERT ... RETURNING id, commit, and reload the rows with a
+    single SELECT instead of a refresh per row. SQLite hands out rowids in VALUES order,
+    so ordering by id keeps the input order.
+    """
+    ids = db.scalars(insert(models.Transaction.__table__).returning(models.Transaction.id), values).all()
+    db.commit()
+    return db.scalars(
+        select(models.Transaction).where(models.Transaction.id.in_(ids)).order_by(models.Transaction.id)
+    ).all()
+
+
+def _read_header(source: BinaryIO) -> list[str]:
+    """
+    Fields of the first non-blank line, which pandas would take as the header.
+    """
+    source.seek(0)
+    for line in source:
+        text = line.decode("utf-8-sig", errors="replace")
+        if text.strip():
+            return next(csv.reader([text]), [])
+    return []
 
-        if balance_value is not None and not pd.isna(balance_value):
-            try:
-                last_balance = Decimal(balance_value)
-            except (TypeError, ValueError):
-                continue
-    return transactions, last_balance
 
+def _parse_csv(source: BinaryIO) -> pd.DataFrame:
+    """
+    Parse a seekable binary CSV file; pandas decodes it while reading, so the upload is
+    never held as one bytes object plus a decoded copy.
+    """
 
-def _parse_csv_bytes(contents: bytes) -> list[dict[str, Any]]:
-    buffer = StringIO(contents.decode("utf-8-sig"))
+    required_keys = {"date", "description", "amount"}
 
     def try_standard_format() -> pd.DataFrame | None:
-        buffer.seek(0)
+        # Headerless exports are common; check the header row with the csv module
+        # first instead of having pandas parse the whole file just to reject it.
+        if not required_keys.issubset(_normalize_header(col) for col in _read_header(source)):
+            return None
+        source.seek(0)
         try:
-            df = pd.read_csv(buffer)
+            df = pd.read_csv(source, encoding="utf-8-sig")
         except Exception:
             return None
 
         header_map = {_normalize_header(col): col for col in df.columns}
-        required_keys = {"date", "description", "amount"}
         if not required_keys.issubset(header_map.keys()):
             return None
 
@@ -101,7 +171,7 @@ def _parse_csv_bytes(contents: bytes) -> list[dict[str, Any]]:
         amount_col = header_map["amount"]
 
         data = {
-            "date": pd.to_datetime(df[date_col], errors="coerce").dt.date,
+            "date": pd.to_datetime(df[date_col], errors="coerce"),
             "description": df[desc_col].astype(str),
             "amount": pd.to_numeric(df[amount_col], errors="coerce"),
         }
@@ -114,16 +184,16 @@ def _parse_csv_bytes(contents: bytes) -> list[dict[str, Any]]:
         return normalized
 
     def try_statement_format() -> pd.DataFrame | None:
-        buffer.seek(0)
+        source.seek(0)
         try:
-            df = pd.read_csv(buffer, header=None)
+            df = pd.read_csv(source, encoding="utf-8-sig", header=None)
         except Exception:
             return None
 
         if df.shape[1] < 4:
             return None
 
-        date_series = pd.to_datetime(df.iloc[:, 0], errors="coerce").dt.date
+        date_series = pd.to_datetime(df.iloc[:, 0], errors="coerce")
         description_series = df.iloc[:, 1].astype(str).str.strip()
 
         balance_series = None
@@ -143,10 +213,7 @@ def _parse_csv_bytes(contents: bytes) -> list[dict[str, Any]]:
         if balance_series is not None:
             data["balance"] = balance_series
 
-        normalized = pd.DataFrame(data).dropna(subset=["date", "description"])
-
-        normalized["amount"] = pd.to_numeric(normalized["amount"], errors="coerce")
-        normalized = normalized.dropna(subset=["amount"])
+        normalized = pd.DataFrame(data).dropna(subset=["date", "description", "amount"])
         return normalized
 
     parsed_df = try_standard_format()
@@ -159,11 +226,11 @@ def _parse_csv_bytes(contents: bytes) -> list[dict[str, Any]]:
             "or a headerless export with columns Date, Description, Amount, Balance."
         )
 
-    return parsed_df.to_dict("records")
+    return parsed_df
 
 
 @router.post("/{account_id}/csv", response_model=list[schemas.TransactionRead])
-async def upload_csv(
+def upload_csv(
     account_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -173,6 +240,8 @@ async def upload_csv(
     Upload a CSV file with transactions for a specific account.
     The CSV is parsed and transactions are saved to the database.
     The CSV must contain 'Date', 'Description', and 'Amount' columns.
+    A plain def, so FastAPI runs the CPU-bound parsing and categorization in its
+    threadpool instead of on the event loop.
     """
     account = (
         db.query(models.Account)
@@ -182,37 +251,29 @@ async def upload_csv(
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
-    try:
-        contents = await file.read()
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Unable to read file: {e}")
-
-    if not contents:
+    if file.size == 0:
         raise HTTPException(status_code=400, detail="Uploaded file is empty.")
 
     try:
-        rows = _parse_csv_bytes(contents)
+        rows = _parse_csv(file.file)
     except ValueError as exc:
         raise HTTPException(
             status_code=400,
             detail=str(exc),
         )
-    transactions, last_balance = _build_transactions(account, rows)
-    if not transactions:
+    values, last_balance = _build_transaction_values(account, rows)
+    if not values:
         raise HTTPException(status_code=400, detail="No valid transactions found in CSV.")
 
-    db.add_all(transactions)
     if last_balance is not None:
         account.latest_balance = last_balance
-    db.commit()
-    for txn in transactions:
-        db.refresh(txn)
-
-    return transactions
+    created = _insert_transactions(db, values)
+    summary_cache.invalidate(current_user.id)
+    return created
 
 
 @router.post("/{account_id}/pdf", response_model=list[schemas.TransactionRead])
-async def upload_pdf(
+def upload_pdf(
     account_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -221,6 +282,7 @@ async def upload_pdf(
     """
     Upload a PDF statement with columns: Date, Description, Amount, Balance.
     The PDF is parsed into transactions and saved to the database.
+    Runs in the threadpool, like upload_csv.
     """
     account = (
         db.query(models.Account)
@@ -230,31 +292,23 @@ async def upload_pdf(
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
-    try:
-        contents = await file.read()
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Unable to read file: {e}")
-
-    if not contents:
+    if file.size == 0:
         raise HTTPException(status_code=400, detail="Uploaded file is empty.")
 
     try:
-        rows = _pdf_extractor.extract(contents)
+        rows = _pdf_extractor.extract(file.file)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
-    transactions, last_balance = _build_transactions(account, rows)
-    if not transactions:
+    values, last_balance = _build_transaction_values(account, rows)
+    if not values:
         raise HTTPException(
             status_code=400,
             detail="PDF parsed successfully but contained no new transactions.",
         )
 
-    db.add_all(transactions)
     if last_balance is not None:
         account.latest_balance = last_balance
-    db.commit()
-    for txn in transactions:
-        db.refresh(txn)
-
-    return transactions
+    created = _insert_transactions(db, values)
+    summary_cache.invalidate(current_user.id)
+    return created
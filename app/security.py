@@ -1,25 +1,56 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import hmac
+import os
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+
+from .config import PBKDF2_ITERATIONS
 
 SECRET_KEY = "changeme-secret-key" 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 
-# Use pbkdf2_sha256 to avoid bcrypt length limits and backend issues
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# pbkdf2_sha256 avoids bcrypt's length limits and backend issues. Hashes use passlib's
+# "$pbkdf2-sha256$<rounds>$<salt>$<digest>" format (adapted base64, "." for "+", no
+# padding), so hashes stored while passlib did this still verify.
+_HASH_PREFIX = "$pbkdf2-sha256$"
+
+
+def _ab64_encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=").replace("+", ".")
+
+
+def _ab64_decode(text: str) -> bytes:
+    text = text.replace(".", "+")
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _pbkdf2(password: str, salt: bytes, rounds: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, rounds, dklen=32)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    if not hashed_password.startswith(_HASH_PREFIX):
+        return False
+    try:
+        rounds, salt, digest = hashed_password[len(_HASH_PREFIX):].split("$")
+        expected = _ab64_decode(digest)
+        derived = _pbkdf2(plain_password, _ab64_decode(salt), int(rounds))
+    except ValueError:
+        return False
+    return hmac.compare_digest(derived, expected)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    salt = os.urandom(16)
+    digest = _pbkdf2(password, salt, PBKDF2_ITERATIONS)
+    return f"{_HASH_PREFIX}{PBKDF2_ITERATIONS}${_ab64_encode(salt)}${_ab64_encode(digest)}"
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -30,5 +61,19 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+_TOKEN_CACHE_MAX_SIZE = 10_000
+# token -> claims, for tokens whose signature already verified. A token is immutable,
+# so only its expiry needs rechecking when it comes back on the next request.
+_verified_tokens: dict[str, dict] = {}
+
+
 def decode_access_token(token: str) -> dict:
-    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    claims = _verified_tokens.get(token)
+    if claims is not None and claims.get("exp", 0) > time.time():
+        return claims
+    _verified_tokens.pop(token, None)
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    if len(_verified_tokens) >= _TOKEN_CACHE_MAX_SIZE:
+        _verified_tokens.clear()
+    _verified_tokens[token] = claims
+    return claims
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
 from datetime import date as date_cls
+from functools import lru_cache
+from itertools import zip_longest
 from io import BytesIO
+import multiprocessing
+import os
 import re
-from typing import Any, Iterable, Iterator, List, Sequence
+from typing import Any, BinaryIO, Iterable, Iterator, List, Sequence
 
 import pandas as pd
 import pdfplumber
@@ -26,7 +32,14 @@ MONTH_MAP = {
 }
 
 
-@dataclass
+# Opening/closing balance lines in a statement table aren't transactions.
+_SKIP_PREFIXES = ("STARTING", "ENDING")
+
+# "JAN5", "SEPT12", "DEC31/24" and the like, once spaces and punctuation are removed.
+_MONTH_DAY_RE = re.compile(r"^(JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEPT?|OCT|NOV|DEC)(\d{1,2})(?:/(\d{2}|\d{4}))?$")
+
+
+@dataclass(slots=True)
 class TransactionRow:
     date: date_cls
     description: str
@@ -34,6 +47,10 @@ class TransactionRow:
     balance: float | None = None
 
 
+# Currency symbol, thousands separators and spaces dropped; a Unicode minus becomes "-".
+_AMOUNT_TRANSLATION = str.maketrans({"$": None, ",": None, " ": None, "\u2212": "-"})
+
+
 def _clean_amount(value: Any) -> float | None:
     if value is None:
         return None
@@ -46,7 +63,7 @@ def _clean_amount(value: Any) -> float | None:
     if text.startswith("(") and text.endswith(")"):
         negative = True
         text = text[1:-1]
-    text = text.replace("$", "").replace(",", "").replace(" ", "").replace("\u2212", "-")
+    text = text.translate(_AMOUNT_TRANSLATION)
     if not text:
         return None
     try:
@@ -82,12 +99,31 @@ def _infer_year_from_text(text: str) -> int | None:
     return year
 
 
+# A statement repeats the same few dozen date tokens across its rows.
+@lru_cache(maxsize=4096)
 def _parse_pdf_date_token(token: str, fallback_year: int | None) -> date_cls | None:
     token = (token or "").strip()
     if not token:
         return None
     normalized = re.sub(r"[^A-Za-z0-9/ ]", "", token).upper()
     compact = normalized.replace(" ", "")
+
+    # Statement dates are nearly always month-name + day; build those directly rather
+    # than through pd.to_datetime, which goes through dateutil per call.
+    match = _MONTH_DAY_RE.match(compact)
+    if match:
+        year = int(match.group(3)) if match.group(3) else fallback_year
+        if year is not None:
+            if year < 100:
+                # Same two-digit pivot as dateutil: within 50 years of today.
+                year += 2000
+                if year >= date_cls.today().year + 50:
+                    year -= 100
+            try:
+                return date_cls(year, MONTH_MAP[match.group(1)], int(match.group(2)))
+            except ValueError:
+                pass
+
     explicit_year = bool(re.search(r"/\d{2,4}", normalized) or re.search(r"\d{4}", normalized))
     candidates: list[str] = []
 
@@ -133,16 +169,20 @@ class Strategy:
     """
     Base class for PDF extraction strategies.
     Each strategy receives the page object and yields TransactionRow instances.
+    `page_text` is the page's extract_text() when the caller already has it.
     """
 
-    def extract(self, page: pdfplumber.page.Page, *, fallback_year: int | None) -> Iterable[TransactionRow]:
+    def extract(
+        self, page: pdfplumber.page.Page, *, fallback_year: int | None, page_text: str | None = None
+    ) -> Iterable[TransactionRow]:
         raise NotImplementedError
 
 
 class TableStrategy(Strategy):
     HEADER_KEYWORDS = {"description", "withdrawal", "deposit", "date", "balance", "transaction"}
-
-    def extract(self, page: pdfplumber.page.Page, *, fallback_year: int | None) -> Iterable[TransactionRow]:
+    def extract(
+        self, page: pdfplumber.page.Page, *, fallback_year: int | None, page_text: str | None = None
+    ) -> Iterable[TransactionRow]:
         tables = page.extract_tables() or []
         for table in tables:
             yield from self._extract_from_table(table, fallback_year=fallback_year)
@@ -167,24 +207,29 @@ class TableStrategy(Strategy):
         if balance_idx is None and len(header) > 4:
             balance_idx = 4
 
-        # Instead of transposing complicated structures, iterate per row
+        # Columns the header doesn't have point at an always-empty padding column, so
+        # each line of a row is read with plain indexing.
+        indices = (desc_idx, withdraw_idx, deposit_idx, date_idx, balance_idx)
+        width = max(index for index in indices if index is not None) + 1
+        desc_idx, withdraw_idx, deposit_idx, date_idx, balance_idx = (
+            width if index is None else index for index in indices
+        )
+
         for raw_row in table[1:]:
-            split_cols = [_split_cell(cell) for cell in raw_row]
-            max_len = max((len(col) for col in split_cols), default=0)
-            if max_len == 0:
-                continue
-            for idx in range(max_len):
-                description = self._value_at(split_cols, desc_idx, idx)
-                withdrawals = self._value_at(split_cols, withdraw_idx, idx)
-                deposits = self._value_at(split_cols, deposit_idx, idx)
-                date_token = self._value_at(split_cols, date_idx, idx)
+            split_cols = [_split_cell(cell) for cell in raw_row[:width]]
+            split_cols += [[]] * (width + 1 - len(split_cols))
+            # A cell can hold several lines; line i of every column is one transaction.
+            for line in zip_longest(*split_cols, fillvalue=""):
+                description = line[desc_idx]
+                withdrawals = line[withdraw_idx]
+                deposits = line[deposit_idx]
 
                 if not description and not withdrawals and not deposits:
                     continue
-                if description.upper().startswith("STARTING") or description.upper().startswith("ENDING"):
+                if description[:8].upper().startswith(_SKIP_PREFIXES):
                     continue
 
-                parsed_date = _parse_pdf_date_token(date_token, fallback_year)
+                parsed_date = _parse_pdf_date_token(line[date_idx], fallback_year)
                 debit = _clean_amount(withdrawals)
                 credit = _clean_amount(deposits)
                 amount = None
@@ -196,16 +241,11 @@ class TableStrategy(Strategy):
                 if parsed_date is None or amount is None:
                     continue
 
-                balance_value = None
-                if balance_idx is not None:
-                    balance_text = self._value_at(split_cols, balance_idx, idx)
-                    balance_value = _clean_amount(balance_text)
-
                 yield TransactionRow(
                     date=parsed_date,
                     description=description,
                     amount=amount,
-                    balance=balance_value,
+                    balance=_clean_amount(line[balance_idx]),
                 )
 
     @staticmethod
@@ -218,17 +258,6 @@ class TableStrategy(Strategy):
                     return idx
         return None
 
-    @staticmethod
-    def _value_at(split_cols: list[list[str]], column_idx: int | None, row_idx: int) -> str:
-        if column_idx is None:
-            return ""
-        if column_idx >= len(split_cols):
-            return ""
-        column = split_cols[column_idx]
-        if row_idx >= len(column):
-            return ""
-        return column[row_idx]
-
 
 class RegexTextStrategy(Strategy):
     """
@@ -236,19 +265,20 @@ class RegexTextStrategy(Strategy):
     Useful when tables cannot be extracted cleanly.
     """
 
+    # One finditer over the page instead of a match() per line. [^\S\n] is \s minus
+    # newline, so a match never runs from one line into the next.
     LINE_RE = re.compile(
-        r"^(?P<date>(?:JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|SEPT|OCT|NOV|DEC)[A-Z\s]*\d{1,2})"
-        r"\s+(?P<desc>.+?)\s+(?P<amount>[\+\-]?\$?\d[\d,]*(?:\.\d{2})?)$",
-        re.IGNORECASE,
+        r"^(?P<date>(?:JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|SEPT|OCT|NOV|DEC)(?:[A-Z]|[^\S\n])*\d{1,2})"
+        r"[^\S\n]+(?P<desc>.+?)[^\S\n]+(?P<amount>[\+\-]?\$?\d[\d,]*(?:\.\d{2})?)$",
+        re.IGNORECASE | re.MULTILINE,
     )
 
-    def extract(self, page: pdfplumber.page.Page, *, fallback_year: int | None) -> Iterable[TransactionRow]:
-        text = page.extract_text() or ""
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        for line in lines:
-            match = self.LINE_RE.match(line)
-            if not match:
-                continue
+    def extract(
+        self, page: pdfplumber.page.Page, *, fallback_year: int | None, page_text: str | None = None
+    ) -> Iterable[TransactionRow]:
+        text = (page.extract_text() or "") if page_text is None else page_text
+        text = "\n".join(line.strip() for line in text.splitlines())
+        for match in self.LINE_RE.finditer(text):
             parsed_date = _parse_pdf_date_token(match.group("date"), fallback_year)
             amount = _clean_amount(match.group("amount"))
             if parsed_date is None or amount is None:
@@ -260,6 +290,39 @@ class RegexTextStrategy(Strategy):
             )
 
 
+# Statements with at least this many pages are split across worker processes.
+_PARALLEL_MIN_PAGES = 4
+
+
+@lru_cache(maxsize=1)
+def _page_pool() -> ProcessPoolExecutor:
+    """
+    Worker processes for page extraction, started on first use and kept warm. They're
+    spawned rather than forked since uploads run on threadpool threads.
+    """
+    return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+
+
+def _extract_page_range(
+    contents: bytes,
+    page_numbers: Sequence[int],
+    page_texts: Sequence[str],
+    strategies: Sequence[Strategy],
+    fallback_year: int | None,
+) -> list[TransactionRow]:
+    """
+    Worker entry point: run every strategy over some pages of the PDF, in page order.
+    """
+    transactions: list[TransactionRow] = []
+    with pdfplumber.open(BytesIO(contents)) as pdf:
+        for number, page_text in zip(page_numbers, page_texts):
+            for strategy in strategies:
+                transactions.extend(
+                    strategy.extract(pdf.pages[number], fallback_year=fallback_year, page_text=page_text)
+                )
+    return transactions
+
+
 class PDFTransactionExtractor:
     """
     Generic PDF transaction extractor composed of multiple strategies.
@@ -272,18 +335,35 @@ class PDFTransactionExtractor:
             RegexTextStrategy(),
         ]
 
-    def extract(self, contents: bytes) -> list[TransactionRow]:
+    def extract(self, contents: bytes | BinaryIO) -> list[TransactionRow]:
+        """
+        `contents` is the PDF's bytes or a seekable binary file, e.g. an upload's spooled file.
+        """
         transactions: list[TransactionRow] = []
+        source = BytesIO(contents) if isinstance(contents, (bytes, bytearray)) else contents
         try:
-            with pdfplumber.open(BytesIO(contents)) as pdf:
+            with pdfplumber.open(source) as pdf:
                 pages = list(pdf.pages)
-                combined_text = "\n".join(
-                    filter(None, ((page.extract_text() or "") for page in pages))
-                )
+                # Extracted once; the year inference and RegexTextStrategy both need it.
+                page_texts = [page.extract_text() or "" for page in pages]
+                combined_text = "\n".join(filter(None, page_texts))
                 fallback_year = _infer_year_from_text(combined_text)
-                for page in pages:
-                    for strategy in self.strategies:
-                        transactions.extend(strategy.extract(page, fallback_year=fallback_year))
+                workers = os.cpu_count() or 1
+                parallel = workers > 1 and len(pages) >= _PARALLEL_MIN_PAGES
+                if parallel:
+                    try:
+                        transactions = self._extract_parallel(source, page_texts, workers, fallback_year)
+                    except BrokenProcessPool:
+                        # A worker died; the next statement gets a fresh pool and this one
+                        # is parsed here.
+                        _page_pool.cache_clear()
+                        parallel = False
+                if not parallel:
+                    for page, page_text in zip(pages, page_texts):
+                        for strategy in self.strategies:
+                            transactions.extend(
+                                strategy.extract(page, fallback_year=fallback_year, page_text=page_text)
+                            )
         except Exception as exc:
             raise ValueError(f"Unable to parse PDF: {exc}") from exc
 
@@ -294,3 +374,28 @@ class PDFTransactionExtractor:
             )
 
         return transactions
+
+    def _extract_parallel(
+        self, source: BinaryIO, page_texts: Sequence[str], workers: int, fallback_year: int | None
+    ) -> list[TransactionRow]:
+        """
+        Pages are independent once fallback_year is known, so give each worker a
+        contiguous range and concatenate the results in page order.
+        """
+        source.seek(0)
+        contents = source.read()
+        page_count = len(page_texts)
+        size = -(-page_count // workers)
+        ranges = [range(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+        futures = [
+            _page_pool().submit(
+                _extract_page_range,
+                contents,
+                pages,
+                page_texts[pages.start : pages.stop],
+                self.strategies,
+                fallback_year,
+            )
+            for pages in ranges
+        ]
+        return [row for future in futures for row in future.result()]
@@ -2,83 +2,82 @@ from __future__ import annotations
 
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Iterable, Sequence
+from typing import Iterable
+
+from sqlalchemy import and_, case, func, not_, or_
 
 from .. import models, schemas
-from ..account_types import CREDIT_ACCOUNT_TYPES, parse_account_type
-from ..category_labels import canonicalize_category
-from ..transaction_logic import classify_transaction
+from ..account_types import CREDIT_ACCOUNT_TYPES, INVESTMENT_ACCOUNT_TYPES
+from ..category_labels import ACCOUNT_TRANSFER_CATEGORY, INVESTMENT_CATEGORY
+from ..transaction_logic import classify_amount
 
 
-@dataclass
+@dataclass(slots=True)
 class AggregateTotals:
     income: float = 0.0
     expenses: float = 0.0
     invested: float = 0.0
 
 
-def aggregate_transactions(rows: Iterable[tuple[models.Transaction, str]]) -> AggregateTotals:
-    totals = AggregateTotals()
-    for txn, account_type_value in rows:
-        classification = classify_transaction(txn, account_type_value)
-
-        if classification.counts_income:
-            totals.income += classification.amount
-
-        if classification.counts_expense:
-            expense_amount = classification.amount
-            if expense_amount > 0:
-                expense_amount = -abs(expense_amount)
-            totals.expenses += expense_amount
-
-        if classification.counts_invested:
-            totals.invested += classification.amount
-
-    return totals
-
-
-def build_category_breakdown(rows: Iterable[tuple[models.Transaction, str]]) -> list[schemas.CategoryExpenseSummary]:
+def build_category_breakdown(
+    rows: Iterable[tuple[str, str | None, float]],
+) -> list[schemas.CategoryExpenseSummary]:
     totals: dict[str, float] = defaultdict(float)
-    for txn, account_type_value in rows:
-        classification = classify_transaction(txn, account_type_value)
+    for account_type_value, category, amount in rows:
+        classification = classify_amount(float(amount or 0), account_type_value, category)
         if not classification.counts_expense:
             continue
-        category_label = canonicalize_category(txn.category) or "Uncategorized"
+        category_label = category or "Uncategorized"
         expense_amount = classification.amount
         if expense_amount > 0:
             expense_amount = -abs(expense_amount)
         totals[category_label] += expense_amount
 
     sorted_totals = sorted(totals.items(), key=lambda item: item[1])
+    # Labels are str and totals float by construction, so skip pydantic validation.
     return [
-        schemas.CategoryExpenseSummary(category=category, total_amount=amount)
+        schemas.CategoryExpenseSummary.model_construct(category=category, total_amount=amount)
         for category, amount in sorted_totals
     ]
 
 
-def filter_transactions_by_kind(
-    rows: Iterable[tuple[models.Transaction, str]],
-    kind: str,
-) -> list[models.Transaction]:
-    filtered: list[models.Transaction] = []
-    for txn, account_type_value in rows:
-        classification = classify_transaction(txn, account_type_value)
-        if kind == "investment" and classification.counts_invested:
-            filtered.append(txn)
-        elif kind == "income" and classification.counts_income:
-            filtered.append(txn)
-        elif kind == "expense" and classification.counts_expense:
-            filtered.append(txn)
-    return filtered
-
-
-def calculate_net_worth(balances: Sequence[tuple[int, str, float | None, float]]) -> float:
-    net_worth = 0.0
-    for _, account_type_value, latest_balance, txn_sum in balances:
-        account_type = parse_account_type(account_type_value)
-        balance_value = float(latest_balance) if latest_balance is not None else float(txn_sum or 0)
-        if account_type in CREDIT_ACCOUNT_TYPES:
-            net_worth -= balance_value
-        else:
-            net_worth += balance_value
-    return net_worth
+def transaction_kind_filter(kind: str):
+    """
+    SQL criterion selecting the transactions `classify_transaction` would count as
+    `kind` ("income", "expense" or "investment"). Expects Transaction joined to Account.
+    Stored categories are canonical, so every transfer/investment alias is already
+    folded into one label.
+    """
+    category = models.Transaction.category
+    account_type = func.lower(models.Account.type)
+    amount = models.Transaction.amount
+
+    is_transfer = func.coalesce(category == ACCOUNT_TRANSFER_CATEGORY, False)
+    is_investment = or_(
+        account_type.in_([atype.value for atype in INVESTMENT_ACCOUNT_TYPES]),
+        func.coalesce(category == INVESTMENT_CATEGORY, False),
+    )
+    # Unknown account types parse as chequing, so anything not credit behaves as cash.
+    is_credit = account_type.in_([atype.value for atype in CREDIT_ACCOUNT_TYPES])
+    counted = and_(amount != 0, not_(is_transfer))
+
+    if kind == "investment":
+        return and_(counted, is_investment)
+    if kind == "income":
+        return and_(counted, not_(is_investment), not_(is_credit), amount > 0)
+    if kind == "expense":
+        return and_(counted, not_(is_investment), or_(is_credit, amount < 0))
+    raise ValueError(f"Unknown transaction kind: {kind}")
+
+
+def aggregate_totals_columns() -> tuple:
+    """
+    SUM(CASE ...) columns for (income, expenses, invested) using `transaction_kind_filter`,
+    so the summary comes back as one row. Expenses are always negative, investments positive.
+    """
+    amount = models.Transaction.amount
+    return (
+        func.coalesce(func.sum(case((transaction_kind_filter("income"), amount), else_=0)), 0),
+        func.coalesce(func.sum(case((transaction_kind_filter("expense"), -func.abs(amount)), else_=0)), 0),
+        func.coalesce(func.sum(case((transaction_kind_filter("investment"), func.abs(amount)), else_=0)), 0),
+    )
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from itertools import count
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+_TTL_SECONDS = 60
+_MAX_USERS = 10_000
+# user id -> (generation, {key: (expires at, value)}). Dashboards poll the summary
+# endpoints, which only change when the user's transactions or accounts do; every
+# write calls invalidate(). The generation stops a read that raced a write from
+# storing its stale result.
+_CACHE: dict[int, tuple[int, dict[Hashable, tuple[float, Any]]]] = {}
+_generations = count(1)
+
+
+def _lookup(user_id: int, key: Hashable) -> tuple[int, Any]:
+    """
+    (generation, cached value or None).
+    """
+    generation, entries = _CACHE.get(user_id) or (0, {})
+    hit = entries.get(key)
+    if hit is not None and hit[0] > time.monotonic():
+        return generation, hit[1]
+    return generation, None
+
+
+def _store(user_id: int, generation: int, key: Hashable, value: Any) -> None:
+    current = _CACHE.get(user_id)
+    if current is None:
+        if generation != 0:
+            return
+        if len(_CACHE) >= _MAX_USERS:
+            _CACHE.clear()
+        current = _CACHE.setdefault(user_id, (0, {}))
+    if current[0] == generation:
+        current[1][key] = (time.monotonic() + _TTL_SECONDS, value)
+
+
+def cached(user_id: int, key: Hashable, compute: Callable[[], T]) -> T:
+    generation, value = _lookup(user_id, key)
+    if value is None:
+        value = compute()
+        _store(user_id, generation, key, value)
+    return value
+
+
+async def cached_async(user_id: int, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+    generation, value = _lookup(user_id, key)
+    if value is None:
+        value = await compute()
+        _store(user_id, generation, key, value)
+    return value
+
+
+def invalidate(user_id: int) -> None:
+    _CACHE[user_id] = (next(_generations), {})
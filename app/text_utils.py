@@ -1,32 +1,32 @@
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 
-STOPWORDS = {
-    "pos",
-    "visa",
-    "debit",
-    "credit",
-    "purchase",
-    "auth",
-    "card",
-    "transaction",
-    "withdrawal",
-    "deposit",
-    "online",
-    "transfer",
-}
-
-NOISE_PATTERNS: tuple[re.Pattern[str], ...] = (
-    re.compile(r"\d{2,}"),  # strip long digit runs (timestamps, ids)
-    re.compile(r"\s+"),
+STOPWORDS = frozenset(
+    {
+        "pos",
+        "visa",
+        "debit",
+        "credit",
+        "purchase",
+        "auth",
+        "card",
+        "transaction",
+        "withdrawal",
+        "deposit",
+        "online",
+        "transfer",
+    }
 )
 
+_PUNCT_TABLE = str.maketrans({";": " ", ",": " "})
+# Long digit runs (timestamps, ids); split() below already collapses whitespace.
+_NOISE_RE = re.compile(r"\d{2,}")
+
 
+@lru_cache(maxsize=4096)
 def normalize_description(text: str) -> str:
-    lowered = (text or "").lower()
-    lowered = lowered.replace(";", " ").replace(",", " ")
-    for pattern in NOISE_PATTERNS:
-        lowered = pattern.sub(" ", lowered)
-    tokens = [tok for tok in lowered.split(" ") if tok and tok not in STOPWORDS]
-    return " ".join(tokens).strip()
+    lowered = (text or "").lower().translate(_PUNCT_TABLE)
+    lowered = _NOISE_RE.sub(" ", lowered)
+    return " ".join(tok for tok in lowered.split() if tok not in STOPWORDS)
@@ -1,16 +1,21 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from decimal import Decimal
 from typing import TYPE_CHECKING, Union
 
 from .account_types import (
-    CASH_ACCOUNT_TYPES,
     CREDIT_ACCOUNT_TYPES,
     INVESTMENT_ACCOUNT_TYPES,
     parse_account_type,
 )
-from .category_labels import canonicalize_category, is_investment_category, is_transfer_category
+from .category_labels import (
+    ACCOUNT_TRANSFER_CATEGORY,
+    INVESTMENT_CATEGORY,
+    canonicalize_category,
+    is_transfer_category,
+)
 
 if TYPE_CHECKING:  # pragma: no cover
     from . import models
@@ -18,7 +23,7 @@ if TYPE_CHECKING:  # pragma: no cover
 Number = Union[float, Decimal]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TransactionClassification:
     amount: float
     counts_income: bool = False
@@ -44,33 +49,61 @@ def normalize_transaction_amount(amount: Number, account_type_value: str, catego
     return -magnitude
 
 
+@lru_cache(maxsize=1024)
+def amount_sign_factors(account_type_value: str, category: str | None) -> tuple[float, float]:
+    """
+    Multipliers (for amount >= 0, for amount < 0) equivalent to `normalize_transaction_amount`,
+    which only ever keeps or flips the sign based on account type and category.
+    """
+    return (
+        float(normalize_transaction_amount(1.0, account_type_value, category)),
+        -float(normalize_transaction_amount(-1.0, account_type_value, category)),
+    )
+
+
 def classify_transaction(txn: "models.Transaction", account_type_value: str) -> TransactionClassification:
-    account_type = parse_account_type(account_type_value)
-    amount = float(txn.amount or 0)
-    category = canonicalize_category(txn.category)
+    return classify_amount(float(txn.amount or 0), account_type_value, txn.category)
 
-    if amount == 0:
-        return TransactionClassification(amount=0.0)
 
-    if is_transfer_category(category):
-        return TransactionClassification(amount=amount, is_transfer=True)
+def _invested(amount: float) -> TransactionClassification:
+    return TransactionClassification(amount=abs(amount), counts_invested=True)
 
-    if account_type in INVESTMENT_ACCOUNT_TYPES or is_investment_category(category):
-        return TransactionClassification(amount=abs(amount), counts_invested=True)
 
-    if account_type in CASH_ACCOUNT_TYPES:
-        if amount > 0:
-            return TransactionClassification(amount=amount, counts_income=True)
-        if amount < 0:
-            return TransactionClassification(amount=amount, counts_expense=True)
+def _expense(amount: float) -> TransactionClassification:
+    return TransactionClassification(amount=amount, counts_expense=True)
 
-    elif account_type in CREDIT_ACCOUNT_TYPES:
+
+def _by_sign(amount: float) -> TransactionClassification:
+    if amount > 0:
+        return TransactionClassification(amount=amount, counts_income=True)
+    if amount < 0:
         return TransactionClassification(amount=amount, counts_expense=True)
+    return TransactionClassification(amount=amount)
 
-    else:
-        if amount > 0:
-            return TransactionClassification(amount=amount, counts_income=True)
-        if amount < 0:
-            return TransactionClassification(amount=amount, counts_expense=True)
 
-    return TransactionClassification(amount=amount)
+# Investment accounts count as invested and credit accounts as expenses whatever the
+# sign; cash and any other account type go by the sign.
+_HANDLER_BY_ACCOUNT_TYPE = {
+    **{account_type: _invested for account_type in INVESTMENT_ACCOUNT_TYPES},
+    **{account_type: _expense for account_type in CREDIT_ACCOUNT_TYPES},
+}
+
+
+def classify_amount(amount: float, account_type_value: str, category: str | None) -> TransactionClassification:
+    """
+    Classify an amount as if it were one transaction. Every rule only looks at the sign,
+    so a sum of same-signed amounts classifies the same as each of its rows.
+    """
+    category = canonicalize_category(category)
+
+    if amount == 0:
+        return TransactionClassification(amount=0.0)
+
+    # Canonical labels fold every transfer/investment alias into one value.
+    if category == ACCOUNT_TRANSFER_CATEGORY:
+        return TransactionClassification(amount=amount, is_transfer=True)
+    if category == INVESTMENT_CATEGORY:
+        return _invested(amount)
+
+    handler = _HANDLER_BY_ACCOUNT_TYPE.get(parse_account_type(account_type_value), _by_sign)
+    return handler(amount)
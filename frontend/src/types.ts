@@ -48,6 +48,9 @@ export interface ListTransactionsParams {
   account_id?: number;
   year?: number;
   month?: number;
+  limit?: number;
+  after_date?: string;
+  after_id?: number;
 }
 
 export interface TransactionCategoryUpdatePayload {